@@ -1,13 +1,30 @@
 from fastapi import APIRouter
 
 # Adjust import based on project structure
-from .endpoints import tasks
+from ...core.config import DB_ASYNC, DEBUG_ENDPOINTS
+from .endpoints import debug, tasks, tasks_async
+
+
+def prefer_async_routes(sync_router: APIRouter, async_router: APIRouter) -> APIRouter:
+    """
+    Swap the routes of `sync_router` for their async counterparts where one
+    exists (same path and methods). The sync router's order is kept so
+    fixed paths still take precedence over parameterised ones.
+    """
+    async_routes = {(route.path, frozenset(route.methods)): route for route in async_router.routes}
+    return APIRouter(
+        routes=[async_routes.get((route.path, frozenset(route.methods)), route) for route in sync_router.routes]
+    )
+
 
 # Create the main API router
 api_router = APIRouter()
 
 # Include routers from endpoint files
-api_router.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
+tasks_router = prefer_async_routes(tasks.router, tasks_async.router) if DB_ASYNC else tasks.router
+api_router.include_router(tasks_router, prefix="/tasks", tags=["Tasks"])
+if DEBUG_ENDPOINTS:
+    api_router.include_router(debug.router, prefix="/debug", tags=["Debug"])
 
 # Add other routers here later if needed, e.g.:
-# api_router.include_router(users.router, prefix="/users", tags=["Users"]) 
\ No newline at end of file
+# api_router.include_router(users.router, prefix="/users", tags=["Users"])
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, Response, status
+
+from ...middleware.compression import decoded_etag
+
+# Conditional request helpers (RFC 9110) for the task endpoints.
+#
+# A task's representation only changes when its version does, so strong ETags
+# are derived from (id, version) pairs and can be checked without rendering
+# the response body. Compressed responses carry them with the content coding
+# appended (middleware/compression.py), which the comparisons below ignore.
+
+
+def task_etag(task) -> str:
+    """Strong ETag for a single task."""
+    return f'"task-{task.id}-v{task.version}"'
+
+
+def tasks_etag(tasks: Iterable) -> str:
+    """Strong ETag for a list of tasks, covering their order and versions."""
+    digest = hashlib.sha1(",".join(f"{t.id}:{t.version}" for t in tasks).encode("ascii"))
+    return f'"tasks-{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP-date (for Last-Modified)."""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return decoded_etag(tag[2:] if tag.startswith("W/") else tag)
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header matches `etag`, i.e. the client's copy is
+    current and a 304 can be sent. Uses weak comparison, as the RFC requires.
+    """
+    if not if_none_match:
+        return False
+    tags = _parse_etags(if_none_match)
+    return "*" in tags or _opaque(etag) in (_opaque(tag) for tag in tags)
+
+
+def not_modified(etag: str, last_modified: Optional[str] = None) -> Response:
+    """Empty 304 response repeating the validators."""
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def expected_version(if_match: Optional[str], task_id: int) -> Optional[int]:
+    """
+    Version of task `task_id` an If-Match header requires, or None if the
+    update is unconditional ("*" or no header). Raises a 412 if none of the
+    listed ETags can match this task (weak ETags never match If-Match).
+    """
+    if not if_match:
+        return None
+    tags = _parse_etags(if_match)
+    if "*" in tags:
+        return None
+    prefix = f'"task-{task_id}-v'
+    for tag in map(decoded_etag, tags):
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            return int(tag[len(prefix):-1])
+    raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Task has been modified")
@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+
+# Adjust imports based on project structure
+from ....schemas import profiling as profiling_schema
+from ....db.profiling import query_profiler
+
+# Debugging aids, only mounted when DEBUG_ENDPOINTS is set (see api/v1/api.py).
+# Settings are per process: with several workers, each one has to be switched.
+router = APIRouter()
+
+
+def _settings() -> profiling_schema.QueryProfiling:
+    return profiling_schema.QueryProfiling(
+        enabled=query_profiler.enabled,
+        slow_query_ms=query_profiler.slow_query_ms,
+        max_queries=query_profiler.max_queries,
+    )
+
+@router.get("/query-profiling", response_model=profiling_schema.QueryProfiling)
+def read_query_profiling():
+    """
+    Show whether slow-query and per-request query count logging is on.
+    """
+    return _settings()
+
+@router.put("/query-profiling", response_model=profiling_schema.QueryProfiling)
+def update_query_profiling(settings_in: profiling_schema.QueryProfilingUpdate):
+    """
+    Switch query profiling on or off, optionally changing its thresholds.
+    """
+    if settings_in.enabled:
+        query_profiler.enable(slow_query_ms=settings_in.slow_query_ms, max_queries=settings_in.max_queries)
+    else:
+        query_profiler.disable()
+    return _settings()
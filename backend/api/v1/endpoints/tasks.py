@@ -1,22 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 # Adjust imports based on project structure
+from .. import conditional, export, feed, serialization
+from ....middleware import admission, coalescing, compression
 from ....schemas import task as task_schema
 from ....crud import crud_task
-from ....db.session import SessionLocal # Or a dependency function to get session
+from ....crud.pagination import InvalidCursorError
+from ....db import routing
+from ....db.session import get_databases
 
 router = APIRouter()
 
 # Dependency to get DB session
 def get_db():
-    db = SessionLocal()
+    db = get_databases().SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# Dependency to get the session factory, for streamed responses that outlive
+# the get_db session (which is closed before the body is sent)
+def get_session_factory():
+    return get_databases().SessionLocal
+
+# Dependencies for read-only routes: a read replica when any are configured,
+# unless the client has to see its own recent writes (see db/routing.py).
+# `db`/`primary` is what they fall back to; an unused Session never connects.
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    factory = routing.replica_session_factory(request.cookies)
+    if factory is None:
+        if routing.pinned_to_primary(request.cookies):
+            db.info[crud_task.SKIP_CACHE] = True
+        yield db
+        return
+    replica = factory()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+def get_read_session_factory(request: Request, primary=Depends(get_session_factory)):
+    return routing.replica_session_factory(request.cookies) or primary
+
 @router.post("/", response_model=task_schema.Task, status_code=status.HTTP_201_CREATED)
 def create_task(
     *, # Forces keyword arguments
@@ -28,30 +59,238 @@ def create_task(
     """
     return crud_task.create_task(db=db, task=task_in)
 
+# Bulk routes are declared before the /{task_id} ones so "bulk" isn't taken for an ID
+
+@router.post("/bulk", response_model=task_schema.TaskBulkResult)
+def create_tasks_bulk(
+    *,
+    db: Session = Depends(get_db),
+    bulk_in: task_schema.TaskBulkCreate
+):
+    """
+    Create many tasks in a single transaction.
+
+    Each item is validated on its own: invalid items are reported in `errors`
+    (by position in the request) and the valid ones are still created.
+    """
+    valid, errors = [], []
+    for index, item in enumerate(bulk_in.tasks):
+        try:
+            valid.append(task_schema.TaskCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append(
+                task_schema.TaskBulkError(index=index, detail=e.errors(include_url=False, include_context=False))
+            )
+    return task_schema.TaskBulkResult(tasks=crud_task.create_tasks(db=db, tasks=valid), errors=errors)
+
+@router.patch("/status/bulk", response_model=task_schema.TaskBulkResult)
+def update_tasks_status_bulk(
+    *,
+    db: Session = Depends(get_db),
+    bulk_in: task_schema.TaskBulkStatusUpdate
+):
+    """
+    Set the status of many tasks in a single statement. IDs that don't exist
+    are reported in `errors`.
+    """
+    updated = crud_task.update_tasks_status(db=db, task_ids=bulk_in.ids, status=bulk_in.status)
+    return task_schema.TaskBulkResult(tasks=updated, errors=_missing_ids(bulk_in.ids, updated))
+
+@router.delete("/bulk", response_model=task_schema.TaskBulkResult)
+def delete_tasks_bulk(
+    *,
+    db: Session = Depends(get_db),
+    bulk_in: task_schema.TaskBulkDelete
+):
+    """
+    Delete many tasks in a single statement. IDs that don't exist are
+    reported in `errors`.
+    """
+    deleted = crud_task.delete_tasks(db=db, task_ids=bulk_in.ids)
+    return task_schema.TaskBulkResult(tasks=deleted, errors=_missing_ids(bulk_in.ids, deleted))
+
+@router.post("/claim", response_model=List[task_schema.Task])
+def claim_tasks(
+    *,
+    db: Session = Depends(get_db),
+    claim_in: task_schema.TaskClaim
+):
+    """
+    Take the next `limit` PENDING tasks, due soonest first, and move them to
+    IN_PROGRESS in one step.
+
+    Concurrent callers never get the same task and don't wait on each other.
+    Fewer tasks (or an empty list) are returned when the queue runs low.
+    """
+    return crud_task.claim_tasks(db=db, limit=claim_in.limit)
+
+def _missing_ids(requested: List[int], found) -> List[task_schema.TaskBulkError]:
+    found_ids = {task.id for task in found}
+    return [
+        task_schema.TaskBulkError(id=task_id, detail="Task not found")
+        for task_id in dict.fromkeys(requested)
+        if task_id not in found_ids
+    ]
+
+# Dependency to collect the task list filters from the query string
+def get_task_filters(
+    status: Optional[List[task_schema.TaskStatus]] = Query(
+        None, description="Only tasks in any of these statuses (repeat to pass several)"
+    ),
+    due_from: Optional[datetime] = Query(None, description="Only tasks due at or after this time"),
+    due_to: Optional[datetime] = Query(None, description="Only tasks due before this time"),
+    overdue: bool = Query(False, description="Only tasks past their due date that are not completed"),
+    title_prefix: Optional[str] = Query(None, max_length=255, description="Case-insensitive title prefix"),
+    search: Optional[str] = Query(None, max_length=255, description="Case-insensitive title substring"),
+    include_archived: bool = Query(False, description="Also return archived (completed and old) tasks"),
+) -> task_schema.TaskFilter:
+    return task_schema.TaskFilter(
+        status=status,
+        due_from=due_from,
+        due_to=due_to,
+        overdue=overdue,
+        title_prefix=title_prefix,
+        search=search,
+        include_archived=include_archived,
+    )
+
+# Header carrying the opaque cursor for the next page of a task listing
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 @router.get("/", response_model=List[task_schema.Task])
+@coalescing.coalesce
 def read_tasks(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    db: Session = Depends(get_read_db),
+    filters: task_schema.TaskFilter = Depends(get_task_filters),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"
+    ),
+    sort: task_schema.TaskSort = task_schema.TaskSort.ID,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieve a filtered, sorted list of tasks.
+
+    Pages are returned in a stable order. When a page is full, the cursor for
+    the next one is sent in the `X-Next-Cursor` response header; passing it
+    back as `cursor` fetches the next page in constant time regardless of depth.
+    `skip` is still supported but gets slower the deeper it goes.
+
+    The page carries an ETag; sending it back in If-None-Match gets a 304
+    while none of the tasks on the page have changed.
+    """
+    if cursor is not None and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="skip cannot be combined with cursor"
+        )
+    try:
+        tasks = crud_task.get_tasks_cached(
+            db=db, skip=skip, limit=limit, cursor=cursor, sort=sort.value, filters=filters
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    etag = conditional.tasks_etag(tasks)
+    if conditional.none_match(if_none_match, etag):
+        return conditional.not_modified(etag)
+    headers = {"ETag": etag}
+
+    next_cursor = crud_task.next_cursor(tasks, limit, sort=sort.value)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # Rows are serialized directly rather than validated against response_model
+    return serialization.task_rows_response(tasks, headers=headers)
+
+# Media types of the export formats
+EXPORT_MEDIA_TYPES = {
+    task_schema.TaskExportFormat.NDJSON: "application/x-ndjson",
+    task_schema.TaskExportFormat.CSV: "text/csv",
+}
+
+@router.get("/export", response_class=StreamingResponse)
+def export_tasks(
+    session_factory=Depends(get_read_session_factory),
+    filters: task_schema.TaskFilter = Depends(get_task_filters),
+    sort: task_schema.TaskSort = task_schema.TaskSort.ID,
+    format: task_schema.TaskExportFormat = task_schema.TaskExportFormat.NDJSON,
 ):
     """
-    Retrieve a list of tasks.
+    Stream every task matching the filters as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written out as they
+    arrive, so memory use stays flat however large the table is.
+    """
+    def body():
+        db = session_factory()
+        try:
+            rows = crud_task.stream_tasks(db=db, sort=sort.value, filters=filters)
+            if format is task_schema.TaskExportFormat.CSV:
+                yield from export.csv_chunks(rows)
+            else:
+                yield from export.ndjson_chunks(rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+@router.get("/stats", response_model=task_schema.TaskStats)
+@coalescing.coalesce
+def read_task_stats(db: Session = Depends(get_read_db)):
+    """
+    Task counts by status, plus overdue and upcoming counts (today, the rest
+    of this week, later) for tasks that aren't completed. Days and weeks are
+    in UTC; weeks start on Monday.
+    """
+    return crud_task.get_task_stats_cached(db=db)
+
+@router.get("/changes", response_class=StreamingResponse)
+@compression.exempt
+@admission.exempt
+async def stream_task_changes():
     """
-    tasks = crud_task.get_tasks(db=db, skip=skip, limit=limit)
-    return tasks
+    Server-sent events for every task created, updated or deleted from now on.
+
+    Each event is named after the change (`created`, `updated`, `deleted`,
+    `archived`)
+    and carries `{"type": ..., "task": {...}}`. A `reset` event means changes
+    may have been missed and the client should reload its tasks.
+    """
+    return StreamingResponse(
+        feed.event_stream(),
+        media_type="text/event-stream",
+        # Don't let caches or proxies (nginx) hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{task_id}", response_model=task_schema.Task)
+@coalescing.coalesce
 def read_task(
     *,
-    db: Session = Depends(get_db),
-    task_id: int
+    db: Session = Depends(get_read_db),
+    task_id: int,
+    response: Response,
+    include_archived: bool = False,
+    if_none_match: Optional[str] = Header(None),
 ):
     """
-    Retrieve a single task by ID.
+    Retrieve a single task by ID (archived tasks only with `include_archived`).
+
+    Sends ETag and Last-Modified; a matching If-None-Match gets a 304.
     """
-    db_task = crud_task.get_task(db=db, task_id=task_id)
+    db_task = crud_task.get_task_cached(db=db, task_id=task_id, include_archived=include_archived)
     if db_task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    etag, last_modified = conditional.task_etag(db_task), conditional.http_date(db_task.updated_at)
+    if conditional.none_match(if_none_match, etag):
+        return conditional.not_modified(etag, last_modified)
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = last_modified
     return db_task
 
 @router.patch("/{task_id}/status", response_model=task_schema.Task)
@@ -59,14 +298,25 @@ def update_task_status(
     *,
     db: Session = Depends(get_db),
     task_id: int,
-    task_in: task_schema.TaskUpdateStatus
+    task_in: task_schema.TaskUpdateStatus,
+    response: Response,
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update the status of a task.
+
+    Send the task's ETag in If-Match to only apply the change if nobody else
+    has updated the task since it was read (412 Precondition Failed otherwise).
     """
-    updated_task = crud_task.update_task_status(db=db, task_id=task_id, task_update=task_in)
+    expected_version = conditional.expected_version(if_match, task_id)
+    updated_task = crud_task.update_task_status(
+        db=db, task_id=task_id, task_update=task_in, expected_version=expected_version
+    )
     if updated_task is None:
+        if expected_version is not None and crud_task.get_task(db=db, task_id=task_id) is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Task has been modified")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    response.headers["ETag"] = conditional.task_etag(updated_task)
     return updated_task
 
 @router.delete("/{task_id}", response_model=task_schema.Task)
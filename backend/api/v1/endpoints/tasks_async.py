@@ -0,0 +1,180 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+# Adjust imports based on project structure
+from .. import conditional, serialization
+from ....schemas import task as task_schema
+from ....crud import crud_task, crud_task_async
+from ....crud.pagination import InvalidCursorError
+from ....db import routing, session as db_session
+from ....middleware import coalescing
+from .tasks import NEXT_CURSOR_HEADER, get_task_filters
+
+# Async versions of the core task routes in tasks.py, used when DB_ASYNC is
+# enabled. They are mounted in place of their sync counterparts (see
+# api/v1/api.py) so paths, parameters and responses must stay identical.
+router = APIRouter()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with db_session.get_databases().AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for read-only routes, like tasks.get_read_db
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    factory = routing.replica_session_factory(request.cookies, is_async=True)
+    if factory is None:
+        if routing.pinned_to_primary(request.cookies):
+            db.info[crud_task.SKIP_CACHE] = True
+        yield db
+        return
+    async with factory() as replica:
+        yield replica
+
+@router.post("/", response_model=task_schema.Task, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    task_in: task_schema.TaskCreate
+):
+    """
+    Create a new task.
+    """
+    return await crud_task_async.create_task(db=db, task=task_in)
+
+@router.post("/claim", response_model=List[task_schema.Task])
+async def claim_tasks(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    claim_in: task_schema.TaskClaim
+):
+    """
+    Take the next `limit` PENDING tasks, due soonest first, and move them to
+    IN_PROGRESS in one step.
+
+    Concurrent callers never get the same task and don't wait on each other.
+    Fewer tasks (or an empty list) are returned when the queue runs low.
+    """
+    return await crud_task_async.claim_tasks(db=db, limit=claim_in.limit)
+
+@router.get("/", response_model=List[task_schema.Task])
+@coalescing.coalesce
+async def read_tasks(
+    db: AsyncSession = Depends(get_async_read_db),
+    filters: task_schema.TaskFilter = Depends(get_task_filters),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"
+    ),
+    sort: task_schema.TaskSort = task_schema.TaskSort.ID,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieve a filtered, sorted list of tasks.
+
+    Pages are returned in a stable order. When a page is full, the cursor for
+    the next one is sent in the `X-Next-Cursor` response header; passing it
+    back as `cursor` fetches the next page in constant time regardless of depth.
+    `skip` is still supported but gets slower the deeper it goes.
+
+    The page carries an ETag; sending it back in If-None-Match gets a 304
+    while none of the tasks on the page have changed.
+    """
+    if cursor is not None and skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="skip cannot be combined with cursor"
+        )
+    try:
+        tasks = await crud_task_async.get_tasks_cached(
+            db=db, skip=skip, limit=limit, cursor=cursor, sort=sort.value, filters=filters
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    etag = conditional.tasks_etag(tasks)
+    if conditional.none_match(if_none_match, etag):
+        return conditional.not_modified(etag)
+    headers = {"ETag": etag}
+
+    next_cursor = crud_task.next_cursor(tasks, limit, sort=sort.value)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # Rows are serialized directly rather than validated against response_model
+    return serialization.task_rows_response(tasks, headers=headers)
+
+@router.get("/stats", response_model=task_schema.TaskStats)
+@coalescing.coalesce
+async def read_task_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Task counts by status, plus overdue and upcoming counts (today, the rest
+    of this week, later) for tasks that aren't completed. Days and weeks are
+    in UTC; weeks start on Monday.
+    """
+    return await crud_task_async.get_task_stats_cached(db=db)
+
+@router.get("/{task_id}", response_model=task_schema.Task)
+@coalescing.coalesce
+async def read_task(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    task_id: int,
+    response: Response,
+    include_archived: bool = False,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieve a single task by ID (archived tasks only with `include_archived`).
+
+    Sends ETag and Last-Modified; a matching If-None-Match gets a 304.
+    """
+    db_task = await crud_task_async.get_task_cached(db=db, task_id=task_id, include_archived=include_archived)
+    if db_task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    etag, last_modified = conditional.task_etag(db_task), conditional.http_date(db_task.updated_at)
+    if conditional.none_match(if_none_match, etag):
+        return conditional.not_modified(etag, last_modified)
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = last_modified
+    return db_task
+
+@router.patch("/{task_id}/status", response_model=task_schema.Task)
+async def update_task_status(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    task_id: int,
+    task_in: task_schema.TaskUpdateStatus,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+):
+    """
+    Update the status of a task.
+
+    Send the task's ETag in If-Match to only apply the change if nobody else
+    has updated the task since it was read (412 Precondition Failed otherwise).
+    """
+    expected_version = conditional.expected_version(if_match, task_id)
+    updated_task = await crud_task_async.update_task_status(
+        db=db, task_id=task_id, task_update=task_in, expected_version=expected_version
+    )
+    if updated_task is None:
+        if expected_version is not None and await crud_task_async.get_task(db=db, task_id=task_id) is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Task has been modified")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    response.headers["ETag"] = conditional.task_etag(updated_task)
+    return updated_task
+
+@router.delete("/{task_id}", response_model=task_schema.Task)
+async def delete_task(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    task_id: int
+):
+    """
+    Delete a task by ID.
+    """
+    deleted_task = await crud_task_async.delete_task(db=db, task_id=task_id)
+    if deleted_task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return deleted_task
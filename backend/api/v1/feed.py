@@ -0,0 +1,40 @@
+import asyncio
+from typing import AsyncIterator
+
+import orjson
+
+from ...core import changes
+
+# Server-sent events framing for the task change feed (GET /tasks/changes).
+
+# Comment line sent while idle, so proxies don't time the stream out
+KEEPALIVE = b": keep-alive\n\n"
+KEEPALIVE_SECONDS = 15
+# Milliseconds EventSource waits before reconnecting after a drop
+RETRY_MS = 3000
+
+
+def sse_message(change: dict) -> bytes:
+    """One event: the change type as the event name, the change as JSON data."""
+    return b"event: " + change["type"].encode() + b"\ndata: " + orjson.dumps(change) + b"\n\n"
+
+
+async def event_stream() -> AsyncIterator[bytes]:
+    """
+    Events from a ChangeHub subscription, until the client goes away. The
+    subscription is only taken once the body is being sent, so a client that
+    disconnects before that never leaves a queue behind.
+    """
+    queue = await changes.hub.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            yield b"".join(sse_message(change) for change in events)
+    finally:
+        # Also runs when the response is cancelled on disconnect
+        changes.hub.unsubscribe(queue)
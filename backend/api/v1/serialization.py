@@ -0,0 +1,15 @@
+from typing import Dict, Iterable, Optional
+
+from fastapi.responses import ORJSONResponse
+
+# Fast path for list responses. FastAPI would otherwise validate every row
+# against the endpoint's response_model and encode the result with
+# jsonable_encoder + json.dumps; for large pages that dominates the request.
+# Rows of crud_task.TASK_COLUMNS already match the Task schema field for
+# field (and in the same order), so they are dumped straight to JSON with
+# orjson. The response_model stays on the route for the OpenAPI schema.
+
+
+def task_rows_response(rows: Iterable, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """JSON array response for TASK_COLUMNS rows, identical to the Task schema's output."""
+    return ORJSONResponse(content=[row._asdict() for row in rows], headers=headers)
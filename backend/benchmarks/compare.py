@@ -0,0 +1,64 @@
+"""
+Compare two benchmark result files from backend.benchmarks.run:
+
+    python -m backend.benchmarks.compare before.json after.json --threshold 10
+
+Prints the change in throughput and p95/p99 latency per scenario and exits
+with status 1 if any scenario got worse by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+# Metric -> True if higher is better
+METRICS = {"throughput_rps": True, "p95_ms": False, "p99_ms": False}
+
+
+def _change(before: float, after: float) -> float:
+    """Relative change in percent."""
+    return (after - before) / before * 100 if before else 0.0
+
+
+def regressions(before: Dict[str, dict], after: Dict[str, dict], threshold: float) -> List[str]:
+    """Descriptions of the metrics that got worse by more than `threshold` percent."""
+    found = []
+    for name in before.keys() & after.keys():
+        for metric, higher_is_better in METRICS.items():
+            change = _change(before[name][metric], after[name][metric])
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                found.append(f"{name} {metric}: {before[name][metric]} -> {after[name][metric]} ({change:+.1f}%)")
+    return sorted(found)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="Allowed regression in percent (default: 10)")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)["scenarios"]
+    with open(args.after) as f:
+        after = json.load(f)["scenarios"]
+
+    print(f"{'scenario':<20}" + "".join(f"{metric:>22}" for metric in METRICS))
+    for name in before:
+        if name not in after:
+            continue
+        cells = [
+            f"{_change(before[name][metric], after[name][metric]):+.1f}% ({after[name][metric]})"
+            for metric in METRICS
+        ]
+        print(f"{name:<20}" + "".join(f"{cell:>22}" for cell in cells))
+
+    found = regressions(before, after, args.threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Benchmark the task API.
+
+Seeds a number of tasks, then drives each task endpoint in turn at a fixed
+concurrency and reports throughput and latency percentiles:
+
+    python -m backend.benchmarks.run --tasks 10000 --requests 2000 --concurrency 16 --output before.json
+
+By default the app is served in-process (httpx over ASGI, on the database
+from DATABASE_URL), which is enough to compare commits against each other.
+For absolute numbers, start the server as it runs in production and pass
+--base-url instead. Compare two result files with backend.benchmarks.compare.
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1/tasks"
+STATUSES = ("PENDING", "IN_PROGRESS", "COMPLETED")
+# Tasks per request when seeding and in the bulk scenarios
+SEED_BATCH = 1000
+BULK_ITEMS = 100
+
+
+@dataclass
+class Context:
+    """State shared by the scenarios of one run."""
+    ids: List[int]
+    # Tasks created by the create scenarios, deleted again by the delete ones
+    created: List[int] = field(default_factory=list)
+    bulk_created: List[List[int]] = field(default_factory=list)
+    cursor: Optional[str] = None
+    etag: Optional[str] = None
+    rng: random.Random = field(default_factory=lambda: random.Random(42))
+
+
+def _task_data(rng: random.Random, index: int) -> dict:
+    due_date = datetime.utcnow() + timedelta(hours=rng.randint(-240, 240))
+    return {
+        "title": f"Benchmark task {index}",
+        "description": "Seeded by backend.benchmarks",
+        "status": rng.choice(STATUSES),
+        "due_date": due_date.isoformat(),
+    }
+
+
+async def _create(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    response = await client.post(f"{API}/", json=_task_data(ctx.rng, len(ctx.created)))
+    if response.status_code == 201:
+        ctx.created.append(response.json()["id"])
+    return response
+
+
+async def _bulk_create(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    tasks = [_task_data(ctx.rng, i) for i in range(BULK_ITEMS)]
+    response = await client.post(f"{API}/bulk", json={"tasks": tasks})
+    if response.status_code == 200:
+        ctx.bulk_created.append([t["id"] for t in response.json()["tasks"]])
+    return response
+
+
+# Scenario name -> request to send. Reads run first, and writes that remove
+# rows only delete what the create scenarios added, so the seeded data is the
+# same for every read scenario and the table ends up the size it started.
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+SCENARIOS: Dict[str, Scenario] = {
+    "list": lambda client, ctx: client.get(f"{API}/", params={"limit": 100}),
+    "list_cursor": lambda client, ctx: client.get(f"{API}/", params={"limit": 100, "cursor": ctx.cursor}),
+    "list_filtered": lambda client, ctx: client.get(
+        f"{API}/", params={"status": "PENDING", "sort": "due_date", "limit": 100}
+    ),
+    "list_search": lambda client, ctx: client.get(f"{API}/", params={"search": "task 12", "limit": 100}),
+    "read": lambda client, ctx: client.get(f"{API}/{ctx.rng.choice(ctx.ids)}"),
+    "read_not_modified": lambda client, ctx: client.get(
+        f"{API}/{ctx.ids[0]}", headers={"If-None-Match": ctx.etag}
+    ),
+    "export": lambda client, ctx: client.get(f"{API}/export"),
+    "create": _create,
+    "bulk_create": _bulk_create,
+    "update_status": lambda client, ctx: client.patch(
+        f"{API}/{ctx.rng.choice(ctx.ids)}/status", json={"status": ctx.rng.choice(STATUSES)}
+    ),
+    "bulk_update_status": lambda client, ctx: client.patch(
+        f"{API}/status/bulk",
+        json={"ids": ctx.rng.sample(ctx.ids, min(BULK_ITEMS, len(ctx.ids))), "status": ctx.rng.choice(STATUSES)},
+    ),
+    "delete": lambda client, ctx: client.delete(f"{API}/{ctx.created.pop()}"),
+    "bulk_delete": lambda client, ctx: client.request("DELETE", f"{API}/bulk", json={"ids": ctx.bulk_created.pop()}),
+}
+
+# Scenarios that are much heavier per request run proportionally fewer times.
+# Paired create/delete scenarios must share a scale.
+SCALE = {"export": 0.05, "bulk_create": 0.1, "bulk_update_status": 0.1, "bulk_delete": 0.1}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples`, which must be sorted."""
+    if not samples:
+        return 0.0
+    return samples[max(math.ceil(pct / 100 * len(samples)), 1) - 1]
+
+
+async def seed(client: httpx.AsyncClient, ctx: Context, count: int) -> None:
+    """Create `count` tasks through the bulk endpoint and prime the context."""
+    for start in range(0, count, SEED_BATCH):
+        tasks = [_task_data(ctx.rng, i) for i in range(start, min(start + SEED_BATCH, count))]
+        response = await client.post(f"{API}/bulk", json={"tasks": tasks})
+        response.raise_for_status()
+        ctx.ids.extend(t["id"] for t in response.json()["tasks"])
+
+    response = await client.get(f"{API}/", params={"limit": 100})
+    response.raise_for_status()
+    ctx.cursor = response.headers.get("X-Next-Cursor")
+    response = await client.get(f"{API}/{ctx.ids[0]}")
+    response.raise_for_status()
+    ctx.etag = response.headers["ETag"]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, ctx: Context, requests: int, concurrency: int
+) -> dict:
+    """Send `requests` requests from `concurrency` concurrent workers."""
+    latencies: List[float] = []
+    errors = 0
+    # Shared between the workers: each request is taken by exactly one of them
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                failed = response.status_code >= 400
+            except (httpx.HTTPError, IndexError):
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    tasks: int,
+    requests: int,
+    concurrency: int,
+    scenarios: Optional[List[str]] = None,
+    warmup: int = 20,
+) -> Dict[str, dict]:
+    """Seed `tasks` tasks and run each scenario; returns results by scenario name."""
+    ctx = Context(ids=[])
+    await seed(client, ctx, tasks)
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        if scenarios and name not in scenarios:
+            continue
+        count = max(int(requests * SCALE.get(name, 1)), 1)
+        # Warm-up requests (connections, caches, query plans) aren't recorded
+        await run_scenario(client, scenario, ctx, min(warmup, count), concurrency)
+        results[name] = await run_scenario(client, scenario, ctx, count, concurrency)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _client(base_url: Optional[str], timeout: float) -> httpx.AsyncClient:
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+    # In-process: imported here so --base-url runs don't need DATABASE_URL
+    from ..db.base_class import Base
+    from ..db.session import get_databases
+    from ..main import app
+
+    Base.metadata.create_all(bind=get_databases().engine)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=timeout)
+
+
+def print_table(results: Dict[str, dict], out=sys.stdout) -> None:
+    out.write(f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}\n")
+    for name, r in results.items():
+        out.write(
+            f"{name:<20}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}\n"
+        )
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the task API endpoints.")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--tasks", type=int, default=10000, help="Tasks to seed (default: 10000)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests (default: 16)")
+    parser.add_argument("--warmup", type=int, default=20, help="Unrecorded requests per scenario (default: 20)")
+    parser.add_argument("--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(",") if args.scenarios else None
+    unknown = set(scenarios or ()) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    async with _client(args.base_url, args.timeout) as client:
+        results = await run_benchmark(
+            client, args.tasks, args.requests, args.concurrency, scenarios=scenarios, warmup=args.warmup
+        )
+
+    print_table(results)
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "target": args.base_url or "in-process",
+            "python": platform.python_version(),
+            "parameters": {
+                "tasks": args.tasks, "requests": args.requests,
+                "concurrency": args.concurrency, "warmup": args.warmup,
+            },
+            "scenarios": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if all(r["errors"] == 0 for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,106 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .metrics import CACHE_REQUESTS
+
+
+class CacheBackend(ABC):
+    """
+    Storage for VersionedCache. Implement this to share the cache between
+    workers (e.g. on Redis); values must then be serialized by the backend.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key`, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    def counter(self, key: str) -> int:
+        """Return the counter at `key` (0 if it was never incremented)."""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment the counter at `key` (never expires) and return it."""
+
+
+class LRUCache(CacheBackend):
+    """In-process, thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class VersionedCache:
+    """
+    Read-through cache invalidated as a whole by bumping a generation number.
+
+    Keys embed the generation current when the read started, so a value
+    loaded concurrently with a write is stored under a generation nobody
+    reads any more rather than outliving the write. Entries from old
+    generations simply age out of the backend.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float, enabled: bool = True) -> None:
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+    def key(self, *parts: Any) -> str:
+        """Build a key for `parts` in the current generation."""
+        generation = self.backend.counter(self._generation_key)
+        return ":".join([self.name, str(generation), *map(str, parts)])
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        CACHE_REQUESTS.labels(self.name, "miss" if value is None else "hit").inc()
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, value, self.ttl)
+
+    def invalidate(self) -> None:
+        """Drop everything cached so far. Call after the write has committed."""
+        if self.enabled:
+            self.backend.incr(self._generation_key)
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.name}:generation"
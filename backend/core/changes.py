@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Set
+
+import orjson
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from ..schemas.task import Task as TaskSchema
+from . import config
+from .metrics import CHANGE_FEED_SUBSCRIBERS
+
+# Task change feed: crud writes record "created", "updated" and "deleted"
+# events on their session, which are published once the transaction commits.
+#
+# On PostgreSQL they are sent with NOTIFY from within the transaction (so they
+# are only delivered if it commits) and every worker runs a single LISTEN
+# connection that fans them out to its subscribers. On other databases events
+# are delivered in-process after commit, which only reaches subscribers of
+# the worker that made the write.
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "task_changes"
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7500
+# Fields kept for a task too large to send whole; clients fetch the rest
+SUMMARY_FIELDS = ("id", "status", "version")
+# Sent to a subscriber that may have missed events (it fell behind, or the
+# listener reconnected): clients should reload instead of patching state
+RESET = {"type": "reset"}
+
+_PENDING_KEY = "task_changes"
+
+
+def _task_fields(task) -> dict:
+    # Works for ORM instances and rows of crud_task.TASK_COLUMNS alike
+    return {name: getattr(task, name) for name in TaskSchema.model_fields}
+
+
+def record(db, event_type: str, tasks: Iterable) -> None:
+    """
+    Queue change events for `tasks` on session `db` (sync or async). They are
+    published if the session commits and dropped if it rolls back. Call it
+    once the tasks have their final values (after a flush or RETURNING).
+    """
+    if not config.CHANGE_FEED_ENABLED:
+        return
+    events = [{"type": event_type, "task": _task_fields(task)} for task in tasks]
+    if events:
+        db.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+def payloads(events: List[dict]) -> List[str]:
+    """Pack events into JSON arrays that each fit in a NOTIFY payload."""
+    batches, batch, size = [], [], 2
+    for change in events:
+        encoded = orjson.dumps(change)
+        if len(encoded) > MAX_PAYLOAD_BYTES:
+            summary = {name: change["task"][name] for name in SUMMARY_FIELDS}
+            encoded = orjson.dumps({"type": change["type"], "task": summary, "truncated": True})
+        if batch and size + len(encoded) + 1 > MAX_PAYLOAD_BYTES:
+            batches.append(batch)
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        batches.append(batch)
+    return [(b"[" + b",".join(batch) + b"]").decode() for batch in batches]
+
+
+def _is_postgresql(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+@event.listens_for(Session, "before_commit")
+def _notify(session: Session) -> None:
+    # Also fires for AsyncSession, whose commit runs the sync session's
+    events = session.info.get(_PENDING_KEY)
+    if events and _is_postgresql(session):
+        for payload in payloads(events):
+            session.execute(select(func.pg_notify(CHANNEL, payload)))
+        del session.info[_PENDING_KEY]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_locally(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        hub.publish_threadsafe(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class ChangeHub:
+    """
+    Fans change events out to the subscribers (open feeds) of this worker.
+    Each subscriber gets a bounded queue of event batches; one that falls
+    behind has its backlog replaced by a RESET event rather than holding
+    memory or slowing down the others.
+    """
+
+    def __init__(self, listen_url: Optional[str] = None, queue_size: int = 256) -> None:
+        self.listen_url = listen_url
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def subscribe(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        if self.listen_url and (self._listener is None or self._listener.done()):
+            self._listener = self._loop.create_task(self._listen())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        CHANGE_FEED_SUBSCRIBERS.inc()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+            CHANGE_FEED_SUBSCRIBERS.dec()
+
+    def publish(self, events: List[dict]) -> None:
+        """Deliver a batch of events to every subscriber (on the event loop)."""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait([RESET])
+
+    def publish_threadsafe(self, events: List[dict]) -> None:
+        """publish() from any thread, e.g. sync routes running in the threadpool."""
+        loop = self._loop
+        if not self._subscribers or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.publish, events)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.publish(orjson.loads(payload))
+
+    async def _listen(self) -> None:
+        """Hold one LISTEN connection, reconnecting with backoff if it drops."""
+        import asyncpg
+
+        delay, connected_before = 1.0, False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.listen_url)
+                try:
+                    await connection.add_listener(CHANNEL, self._on_notify)
+                    if connected_before:
+                        # Anything sent while reconnecting was missed
+                        self.publish([RESET])
+                    connected_before, delay = True, 1.0
+                    while True:
+                        await asyncio.sleep(30)
+                        # Keep-alive, and notices a dead connection
+                        await connection.execute("SELECT 1")
+                finally:
+                    await connection.close(timeout=5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Change feed listener lost its connection (%s); retrying in %.0fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+def _listen_url() -> Optional[str]:
+    url = config.CHANGE_FEED_DATABASE_URL or config.DATABASE_URL
+    if not url or make_url(url).get_backend_name() != "postgresql":
+        return None
+    # asyncpg takes a plain libpq-style URL, without the SQLAlchemy driver name
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+hub = ChangeHub(listen_url=_listen_url())
@@ -8,16 +8,137 @@ env_path = Path(__file__).parent.parent / '.env'
 # Load environment variables from .env file
 load_dotenv(dotenv_path=env_path)
 
-# Use os.getenv to fetch the variable, providing a default is good practice
-# though for DATABASE_URL, we might want it to fail if not set.
+
+def getenv_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from the environment (accepts 1/true/yes/on)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Required to serve requests, but only checked when the engines are first
+# created (see db/session.py), so the app can be imported without it
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    # In a real app, you might provide a default SQLite URL for local dev
-    # or raise a more specific configuration error.
-    print("Warning: DATABASE_URL environment variable not set.")
-    # Example fallback (not recommended for production):
-    # DATABASE_URL = "sqlite:///./test.db"
+# Serve the task endpoints from async SQLAlchemy sessions (asyncpg) instead of
+# sync sessions run in the threadpool.
+DB_ASYNC = getenv_bool("DB_ASYNC")
+
+# Optional explicit URL for the async engine. When unset it is derived from
+# DATABASE_URL by swapping in the async driver (see db/session.py).
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Read replicas (comma-separated URLs). When set, the read-only task routes
+# (get, list, stats, export) use them in turn and writes stay on the primary.
+# A client that writes is sent to the primary for READ_YOUR_WRITES_SECONDS
+# (longer than the replicas usually lag) so it always sees its own changes.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Connection pool tuning, applied per engine and therefore per worker process
+# (total connections = workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds to wait for a connection before giving up with a TimeoutError
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections older than this many seconds (-1 disables recycling)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+# Test connections with a lightweight ping on checkout
+DB_POOL_PRE_PING = getenv_bool("DB_POOL_PRE_PING", True)
+# Set when connecting through an external pooler such as pgbouncer in
+# transaction mode: connections are not pooled locally (NullPool) and
+# asyncpg's prepared statement cache is disabled.
+DB_EXTERNAL_POOLER = getenv_bool("DB_EXTERNAL_POOLER")
+
+# Startup warm-up: each worker opens this many connections per pool (at most
+# DB_POOL_SIZE; 0 skips it) and primes them before GET /health/ready
+# reports it ready.
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))
+# Seconds startup waits for the warm-up; the worker starts (unready) after that
+DB_POOL_WARMUP_TIMEOUT = float(os.getenv("DB_POOL_WARMUP_TIMEOUT", "10"))
+# Seconds the readiness check waits for the database before reporting it down
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+# Read-through cache for task reads (in-process LRU). Every write invalidates
+# it, but only in the worker that made the write: with several workers, reads
+# elsewhere can be up to CACHE_TTL_SECONDS stale.
+CACHE_ENABLED = getenv_bool("CACHE_ENABLED")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "5"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+# Query profiling: log statements slower than SLOW_QUERY_MS (with their
+# EXPLAIN plan) and requests issuing more than MAX_QUERIES_PER_REQUEST
+# statements. Off by default; it can also be switched at runtime through the
+# debug endpoints, which are only mounted when DEBUG_ENDPOINTS is set.
+QUERY_PROFILING = getenv_bool("QUERY_PROFILING")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+MAX_QUERIES_PER_REQUEST = int(os.getenv("MAX_QUERIES_PER_REQUEST", "10"))
+DEBUG_ENDPOINTS = getenv_bool("DEBUG_ENDPOINTS")
+
+# Change feed (GET /tasks/changes). Writes publish events with NOTIFY on
+# PostgreSQL; each worker LISTENs on one connection, which has to bypass
+# transaction-mode poolers: set CHANGE_FEED_DATABASE_URL to a direct URL then.
+CHANGE_FEED_ENABLED = getenv_bool("CHANGE_FEED_ENABLED", True)
+CHANGE_FEED_DATABASE_URL = os.getenv("CHANGE_FEED_DATABASE_URL")
+
+# Archiver (jobs/archive.py): completed tasks untouched for this many days
+# are moved to the archive table, this many per transaction
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# Admission control (middleware/admission.py). Each API route admits up to
+# ADMISSION_CONCURRENCY requests at a time (default: one per pooled
+# connection) and queues up to ADMISSION_QUEUE_SIZE more for at most
+# ADMISSION_QUEUE_TIMEOUT seconds; anything beyond gets a 503 with
+# Retry-After. While connection checkouts take longer than
+# ADMISSION_POOL_WAIT_BUDGET seconds and the pool is exhausted, reads are
+# rejected before they queue so writes keep their connections.
+# ADMISSION_ROUTE_LIMITS overrides the limit per route, e.g.
+# "GET /api/v1/tasks/export=2,POST /api/v1/tasks/bulk=4".
+ADMISSION_ENABLED = getenv_bool("ADMISSION_ENABLED", True)
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", str(2 * ADMISSION_CONCURRENCY)))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_POOL_WAIT_BUDGET = float(os.getenv("ADMISSION_POOL_WAIT_BUDGET", "0.25"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+ADMISSION_ROUTE_LIMITS = {
+    tuple(route.strip().split(None, 1)): int(limit)
+    for route, _, limit in (item.rpartition("=") for item in os.getenv("ADMISSION_ROUTE_LIMITS", "").split(","))
+    if route.strip()
+}
+
+# Single-flight reads (middleware/coalescing.py): identical concurrent GETs
+# to the list, read and stats routes share one query and response
+COALESCE_ENABLED = getenv_bool("COALESCE_ENABLED", True)
+
+# Response compression (middleware/compression.py): encodings in order of
+# preference, used when the client accepts them and they are installed (br
+# needs brotli, zstd needs zstandard). Complete responses smaller than
+# COMPRESSION_MIN_SIZE bytes are sent uncompressed.
+COMPRESSION_ENABLED = getenv_bool("COMPRESSION_ENABLED", True)
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Production server (server.py). Every worker process has its own engines, so
+# the database sees up to WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# connections. SERVER_LOOP/SERVER_HTTP "auto" use uvloop and httptools.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+# Seconds an idle keep-alive connection is held open; keep it above the load
+# balancer's idle timeout so it never reuses a connection being closed
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Seconds in-flight requests (and open change feeds) get on shutdown/restart
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_ACCESS_LOG = getenv_bool("SERVER_ACCESS_LOG", True)
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# lock_timeout for migrations on PostgreSQL (empty to wait indefinitely)
+MIGRATION_LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
 
 # You can add other configurations here later, e.g.:
 # API_V1_STR: str = "/api/v1"
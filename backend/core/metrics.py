@@ -0,0 +1,175 @@
+import atexit
+import os
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Prometheus metrics for the API. Everything is registered on the default
+# registry and served by the /metrics route in main.py.
+#
+# Under server.py with several workers, PROMETHEUS_MULTIPROC_DIR is set and
+# each process writes its values to files there; a scrape (served by any one
+# worker) adds them all up.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Label for anything that didn't match a route, so unknown paths can't blow
+# up the number of time series
+UNMATCHED_ROUTE = "<unmatched>"
+
+# ASGI scope of the request being handled. FastAPI stores the matched route in
+# the scope, so code running for a request (e.g. query events) can label its
+# metrics with the route template.
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+def current_route() -> str:
+    """Path template of the route handling the current request, if any."""
+    scope = current_scope.get()
+    route = scope.get("route") if scope is not None else None
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+# --- HTTP requests --- #
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10)
+
+HTTP_REQUESTS = Counter(
+    "taskapi_http_requests",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "taskapi_http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "taskapi_http_requests_in_progress",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "taskapi_admission_rejections",
+    "Requests turned away with a 503 by admission control, by route and reason",
+    ["method", "route", "reason"],
+)
+ADMISSION_QUEUED = Gauge(
+    "taskapi_admission_queued",
+    "Requests waiting for a slot in admission control",
+    multiprocess_mode="livesum",
+)
+
+COALESCED_REQUESTS = Counter(
+    "taskapi_coalesced_requests",
+    "Coalesced reads by route: 'executed' ran the request, 'shared' reused an identical one in flight",
+    ["route", "result"],
+)
+
+# --- Database queries --- #
+
+DB_QUERIES = Counter(
+    "taskapi_db_queries",
+    "SQL statements executed, by engine, route and statement type",
+    ["engine", "route", "operation"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "taskapi_db_query_duration_seconds",
+    "Time spent executing SQL statements (driver round-trip)",
+    ["engine", "route", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# --- Connection pool --- #
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "taskapi_db_pool_checkout_seconds",
+    "Time taken to check a connection out of the pool (queueing, connecting and pre-ping)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "taskapi_db_pool_checkout_timeouts",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds",
+    ["pool"],
+)
+
+
+# --- Caching --- #
+
+CACHE_REQUESTS = Counter(
+    "taskapi_cache_requests",
+    "Cache lookups by outcome (hit/miss)",
+    ["cache", "result"],
+)
+
+
+# --- Change feed --- #
+
+CHANGE_FEED_SUBSCRIBERS = Gauge(
+    "taskapi_change_feed_subscribers",
+    "Clients connected to the task change feed",
+    multiprocess_mode="livesum",
+)
+
+
+class PoolCollector:
+    """
+    Reports the state of each registered engine's pool when scraped, so the
+    request path pays nothing for these gauges.
+    """
+
+    def __init__(self) -> None:
+        self._engines: Dict[str, object] = {}
+
+    def register(self, name: str, engine) -> None:
+        # Keep the engine rather than its pool: engine.dispose() swaps in a new pool
+        self._engines[name] = getattr(engine, "sync_engine", engine)
+
+    def collect(self):
+        size = GaugeMetricFamily("taskapi_db_pool_size", "Configured pool size", labels=["pool"])
+        checked_out = GaugeMetricFamily(
+            "taskapi_db_pool_checked_out", "Connections currently checked out", labels=["pool"]
+        )
+        checked_in = GaugeMetricFamily(
+            "taskapi_db_pool_checked_in", "Idle connections held by the pool", labels=["pool"]
+        )
+        overflow = GaugeMetricFamily(
+            "taskapi_db_pool_overflow", "Connections open beyond the pool size", labels=["pool"]
+        )
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            # Only queue pools keep connections; NullPool (external pooler) has nothing to report
+            if not hasattr(pool, "checkedout"):
+                continue
+            size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            checked_in.add_metric([name], pool.checkedin())
+            overflow.add_metric([name], max(pool.overflow(), 0))
+        yield from (size, checked_out, checked_in, overflow)
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+if MULTIPROCESS:
+    # Drop this worker's in-progress/subscriber gauges when it exits
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
+
+
+def render_metrics() -> tuple:
+    """Return (body, content type) for the Prometheus text exposition."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Pools belong to a process: these describe the worker serving the scrape
+        registry.register(pool_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,20 +1,322 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import Row, Select, case, delete, func, insert, literal, select, tuple_, union_all, update
+from sqlalchemy.orm import Session, aliased
 # Import Optional and List from typing
-from typing import Optional, List
+from typing import Iterator, Optional, List, Tuple
 
-from ..models.task import Task, TaskStatus
+from ..core import changes, config
+from ..core.cache import LRUCache, VersionedCache
+from ..models.task import ArchivedTask, Task, TaskStatus
 # Import the schemas to use for type hinting and data handling
-from ..schemas.task import TaskCreate, TaskUpdateStatus
+from ..schemas import task as task_schema
+from ..schemas.task import TaskCreate, TaskFilter, TaskUpdateStatus
+from .pagination import decode_cursor, encode_cursor
+
+# Columns the task list can be ordered by ("-" prefix means descending). The
+# primary key is always used as a tie-breaker so the ordering is total and
+# keyset cursors are unambiguous.
+SORT_COLUMNS = {
+    "id": Task.id,
+    "due_date": Task.due_date,
+    "title": Task.title,
+    "status": Task.status,
+}
+DEFAULT_SORT = "id"
+
+# Columns selected when plain rows are returned instead of ORM instances: by
+# the RETURNING statements (the session would expire instances on commit, and
+# try to reload them, or fail to for deleted rows) and by the list reads (rows
+# are much cheaper to load and serialize). They follow the field order of the
+# Task response schema so a row's _asdict() renders exactly like the schema.
+TASK_COLUMNS = tuple(Task.__table__.c[name] for name in task_schema.Task.model_fields)
+
+# Read-through cache used by get_task_cached()/get_tasks_cached(). Every write
+# below invalidates it once committed. Swap `task_cache.backend` for a shared
+# CacheBackend to have writes invalidate it across workers.
+task_cache = VersionedCache(
+    "tasks",
+    LRUCache(max_entries=config.CACHE_MAX_ENTRIES),
+    ttl=config.CACHE_TTL_SECONDS,
+    enabled=config.CACHE_ENABLED,
+)
+# Session.info flag for sessions whose reads must not come from task_cache:
+# ones serving a client that has to see its own recent writes (db/routing.py),
+# which a cached read may predate
+SKIP_CACHE = "skip_task_cache"
+
+
+def use_cache(db) -> bool:
+    """Whether reads on session `db` (sync or async) go through task_cache."""
+    return task_cache.enabled and not db.info.get(SKIP_CACHE)
+
+
+def _sort_column(sort: str, source=Task) -> Tuple[object, bool]:
+    """Resolve a sort name such as "-due_date" to (column of `source`, descending)."""
+    descending = sort.startswith("-")
+    return getattr(source, SORT_COLUMNS[sort.lstrip("-")].key), descending
+
+
+def _source(filters: Optional[TaskFilter]):
+    """
+    What a task query selects from: the tasks table, or with
+    `filters.include_archived` the union of it and the archive, aliased to
+    the Task entity so the same filters, ordering and cursors apply.
+    """
+    if filters is None or not filters.include_archived:
+        return Task
+    archived_columns = [ArchivedTask.__table__.c[column.key] for column in Task.__table__.c]
+    all_tasks = union_all(select(Task.__table__), select(*archived_columns)).subquery("all_tasks")
+    return aliased(Task, all_tasks)
+
+
+def _apply_filters(query: Select, filters: TaskFilter, source=Task) -> Select:
+    """Narrow a Task query down to the rows matching `filters`."""
+    if filters.status:
+        query = query.where(source.status.in_(filters.status))
+    if filters.due_from is not None:
+        query = query.where(source.due_date >= filters.due_from)
+    if filters.due_to is not None:
+        query = query.where(source.due_date < filters.due_to)
+    if filters.overdue:
+        query = query.where(source.due_date < datetime.utcnow(), source.status != TaskStatus.COMPLETED)
+    if filters.title_prefix:
+        query = query.where(source.title.istartswith(filters.title_prefix, autoescape=True))
+    if filters.search:
+        query = query.where(source.title.icontains(filters.search, autoescape=True))
+    return query
+
+
+def _ordered(query: Select, sort: str, source=Task) -> Select:
+    """Order a Task query by `sort`, with the id as tie-breaker."""
+    sort_column, descending = _sort_column(sort, source)
+    keys = [sort_column] if sort_column.key == "id" else [sort_column, source.id]
+    return query.order_by(*(key.desc() if descending else key for key in keys))
+
+
+def _row_columns(source) -> list:
+    return list(TASK_COLUMNS) if source is Task else [getattr(source, column.key) for column in TASK_COLUMNS]
+
+
+def task_statement(task_id: int) -> Select:
+    """SELECT for a single task by ID (shared with the async CRUD functions)."""
+    return select(Task).where(Task.id == task_id)
+
+
+def archived_task_statement(task_id: int) -> Select:
+    """SELECT for a single archived task by ID."""
+    return select(ArchivedTask).where(ArchivedTask.id == task_id)
+
+
+def tasks_statement(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+    rows: bool = False,
+) -> Select:
+    """
+    SELECT for a filtered page of tasks in a stable order (shared with the
+    async CRUD functions). With `rows`, selects TASK_COLUMNS instead of Task
+    entities.
+
+    If `cursor` is given the page starts right after the row it points at
+    (keyset pagination), which costs the same at any depth. Otherwise the
+    classic `skip` offset is used.
+    """
+    source = _source(filters)
+    sort_column, descending = _sort_column(sort, source)
+    query = _ordered(select(*_row_columns(source)) if rows else select(source), sort, source)
+    if filters is not None:
+        query = _apply_filters(query, filters, source)
+
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort)
+        if sort_column.key == "id":
+            position, after = source.id, last_id
+        else:
+            # Bound with the column's type: guessed from the Python value, a
+            # status would be sent as VARCHAR, which PostgreSQL can't compare
+            # with its enum
+            position, after = tuple_(sort_column, source.id), tuple_(literal(value, sort_column.type), last_id)
+        query = query.where(position < after if descending else position > after)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def get_task(db: Session, task_id: int, include_archived: bool = False) -> Optional[Task]:
+    """
+    Get a single task by ID. Archived tasks are only looked up with
+    `include_archived`, and come back as (read-only) ArchivedTask instances.
+    """
+    task = db.scalars(task_statement(task_id)).first()
+    if task is None and include_archived:
+        return db.scalars(archived_task_statement(task_id)).first()
+    return task
+
+
+def get_tasks(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Task]:
+    """Get a filtered list of tasks in a stable order (see tasks_statement())."""
+    statement = tasks_statement(skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return list(db.scalars(statement).all())
+
+
+def get_task_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Row]:
+    """
+    Like get_tasks(), but returns plain rows of TASK_COLUMNS, skipping ORM
+    instance construction and identity-map bookkeeping.
+    """
+    statement = tasks_statement(skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters, rows=True)
+    return list(db.execute(statement).all())
+
+
+def next_cursor(tasks: List[Task], limit: int, sort: str = DEFAULT_SORT) -> Optional[str]:
+    """Cursor for the page after `tasks`, or None if this was the last page."""
+    if not tasks or len(tasks) < limit:
+        return None
+    last = tasks[-1]
+    sort_column, _ = _sort_column(sort)
+    return encode_cursor(sort, getattr(last, sort_column.key), last.id)
+
+
+def stream_tasks(
+    db: Session,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+    batch_size: int = 1000,
+) -> Iterator[Row]:
+    """
+    Yield every matching task as a plain row, fetching `batch_size` rows at a
+    time through a server-side cursor so memory use doesn't grow with the
+    table. The session must stay open until the iterator is exhausted.
+    """
+    source = _source(filters)
+    query = _ordered(select(*_row_columns(source)), sort, source)
+    if filters is not None:
+        query = _apply_filters(query, filters, source)
+    # yield_per implies stream_results (a named cursor on psycopg2)
+    yield from db.execute(query.execution_options(yield_per=batch_size))
+
+
+def tasks_cache_key(skip, limit, cursor, sort, filters: Optional[TaskFilter]) -> str:
+    """Cache key for a task list query, in the cache's current generation."""
+    filters_key = filters.model_dump_json() if filters is not None else ""
+    return task_cache.key("list", skip, limit, cursor, sort, filters_key)
+
+
+def get_task_cached(db: Session, task_id: int, include_archived: bool = False) -> Optional[task_schema.Task]:
+    """
+    Like get_task(), through task_cache. Returns an immutable snapshot
+    (schema object) rather than a session-bound ORM instance.
+    """
+    if not use_cache(db):
+        return get_task(db, task_id=task_id, include_archived=include_archived)
+    key = task_cache.key("task", task_id, include_archived)
+    cached = task_cache.get(key)
+    if cached is not None:
+        return cached
+    db_task = get_task(db, task_id=task_id, include_archived=include_archived)
+    if db_task is None:
+        # Not cached: the ID could be taken by a task created later
+        return None
+    task = task_schema.Task.model_validate(db_task)
+    task_cache.set(key, task)
+    return task
+
 
+def get_tasks_cached(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Row]:
+    """Like get_task_rows(), through task_cache (rows are immutable, so are cached as is)."""
+    if not use_cache(db):
+        return get_task_rows(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    key = tasks_cache_key(skip, limit, cursor, sort, filters)
+    cached = task_cache.get(key)
+    if cached is not None:
+        return list(cached)
+    rows = get_task_rows(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    task_cache.set(key, tuple(rows))
+    return rows
 
-def get_task(db: Session, task_id: int) -> Optional[Task]:
-    """Get a single task by ID."""
-    return db.query(Task).filter(Task.id == task_id).first()
 
+def stats_statement(now: datetime) -> Select:
+    """
+    Task counts per status, split by due date relative to `now` (naive UTC):
+    overdue, due later today, later this week (up to Monday) and after that.
+    A single GROUP BY over (status, due_date), which the
+    ix_tasks_status_due_date_id index covers on its own.
+    """
+    tomorrow = datetime.combine(now.date(), time.min) + timedelta(days=1)
+    next_week = datetime.combine(now.date() - timedelta(days=now.weekday()), time.min) + timedelta(days=7)
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[Task]:
-    """Get a list of tasks with pagination."""
-    return db.query(Task).offset(skip).limit(limit).all()
+    def count_where(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    return select(
+        Task.status,
+        func.count().label("total"),
+        count_where(Task.due_date < now).label("overdue"),
+        count_where((Task.due_date >= now) & (Task.due_date < tomorrow)).label("today"),
+        count_where((Task.due_date >= tomorrow) & (Task.due_date < next_week)).label("this_week"),
+        count_where(Task.due_date >= next_week).label("later"),
+    ).group_by(Task.status)
+
+
+def task_stats(rows, now: datetime) -> task_schema.TaskStats:
+    """Build the stats response from the rows of stats_statement()."""
+    stats = task_schema.TaskStats(generated_at=now)
+    for row in rows:
+        stats.total += row.total
+        stats.by_status[row.status] = row.total
+        # Completed tasks are neither overdue nor due
+        if row.status != TaskStatus.COMPLETED:
+            stats.overdue += row.overdue
+            stats.due.today += row.today
+            stats.due.this_week += row.this_week
+            stats.due.later += row.later
+    return stats
+
+
+def get_task_stats(db: Session, now: Optional[datetime] = None) -> task_schema.TaskStats:
+    now = now or datetime.utcnow()
+    return task_stats(db.execute(stats_statement(now)), now)
+
+
+def get_task_stats_cached(db: Session) -> task_schema.TaskStats:
+    """
+    Like get_task_stats(), through task_cache. Any write invalidates it, so
+    only the due-date buckets can lag, by up to the cache TTL.
+    """
+    if not use_cache(db):
+        return get_task_stats(db)
+    key = task_cache.key("stats")
+    cached = task_cache.get(key)
+    if cached is not None:
+        return cached
+    stats = get_task_stats(db)
+    task_cache.set(key, stats)
+    return stats
 
 
 def create_task(db: Session, task: TaskCreate) -> Task:
@@ -23,29 +325,206 @@ def create_task(db: Session, task: TaskCreate) -> Task:
     task_data = task.model_dump() # Use task.dict() if using Pydantic V1
     db_task = Task(**task_data)
     db.add(db_task)
+    db.flush()
+    changes.record(db, "created", [db_task])
     db.commit()
+    task_cache.invalidate()
     db.refresh(db_task)
     return db_task
 
 
-def update_task_status(db: Session, task_id: int, task_update: TaskUpdateStatus) -> Optional[Task]:
-    """Update the status of an existing task using data from TaskUpdateStatus schema."""
-    db_task = get_task(db, task_id=task_id)
-    if db_task:
-        # Only update the status field from the input schema
-        db_task.status = task_update.status
-        db.commit()
-        db.refresh(db_task)
-    return db_task
+def _status_values(status: TaskStatus) -> dict:
+    # Every update bumps the version (updated_at is set by the column's onupdate)
+    return {"status": status, "version": Task.version + 1}
 
 
-def delete_task(db: Session, task_id: int) -> Optional[Task]:
-    """Delete a task by ID."""
-    db_task = get_task(db, task_id=task_id)
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-    return db_task
+def update_status_statement(task_id: int, status: TaskStatus, expected_version: Optional[int] = None):
+    """
+    UPDATE ... RETURNING for one task's status (shared with the async CRUD
+    functions). With `expected_version`, only updates the task if it is still
+    at that version.
+    """
+    statement = update(Task).where(Task.id == task_id)
+    if expected_version is not None:
+        statement = statement.where(Task.version == expected_version)
+    return (
+        statement
+        .values(**_status_values(status))
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_statement(task_id: int):
+    """DELETE ... RETURNING for one task (shared with the async CRUD functions)."""
+    return (
+        delete(Task)
+        .where(Task.id == task_id)
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def update_task_status(
+    db: Session, task_id: int, task_update: TaskUpdateStatus, expected_version: Optional[int] = None
+) -> Optional[Row]:
+    """
+    Update the status of an existing task using data from TaskUpdateStatus schema.
+
+    A single UPDATE ... RETURNING round-trip; returns the updated row, or
+    None if there is no such task (or it is no longer at `expected_version`).
+    """
+    row = db.execute(update_status_statement(task_id, task_update.status, expected_version)).first()
+    if row is not None:
+        changes.record(db, "updated", [row])
+    db.commit()
+    task_cache.invalidate()
+    return row
+
+
+def delete_task(db: Session, task_id: int) -> Optional[Row]:
+    """
+    Delete a task by ID with a single DELETE ... RETURNING round-trip.
+    Returns the deleted row, or None if there was no such task.
+    """
+    row = db.execute(delete_statement(task_id)).first()
+    if row is not None:
+        changes.record(db, "deleted", [row])
+    db.commit()
+    task_cache.invalidate()
+    return row
+
+
+def create_tasks(db: Session, tasks: List[TaskCreate]) -> List[Row]:
+    """
+    Create many tasks in one transaction with multi-row INSERT ... RETURNING
+    statements. The result is in the same order as `tasks`.
+    """
+    if not tasks:
+        return []
+    statement = insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True)
+    rows = list(db.execute(statement, [task.model_dump() for task in tasks]).all())
+    changes.record(db, "created", rows)
+    db.commit()
+    task_cache.invalidate()
+    return rows
+
+
+def update_tasks_status(db: Session, task_ids: List[int], status: TaskStatus) -> List[Row]:
+    """
+    Set the status of many tasks with a single UPDATE ... WHERE id IN (...)
+    RETURNING. Only the tasks that exist are returned.
+    """
+    statement = (
+        update(Task)
+        .where(Task.id.in_(set(task_ids)))
+        .values(**_status_values(status))
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    rows = list(db.execute(statement).all())
+    changes.record(db, "updated", rows)
+    db.commit()
+    task_cache.invalidate()
+    return rows
+
+
+def delete_tasks(db: Session, task_ids: List[int]) -> List[Row]:
+    """
+    Delete many tasks with a single DELETE ... WHERE id IN (...) RETURNING.
+    Only the tasks that existed are returned.
+    """
+    statement = (
+        delete(Task)
+        .where(Task.id.in_(set(task_ids)))
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    rows = list(db.execute(statement).all())
+    changes.record(db, "deleted", rows)
+    db.commit()
+    task_cache.invalidate()
+    return rows
+
+
+def claim_statement(limit: int):
+    """
+    UPDATE ... RETURNING moving the `limit` pending tasks due soonest to
+    IN_PROGRESS (shared with the async CRUD functions). Rows locked by a
+    concurrent claim are skipped rather than waited for, so concurrent
+    callers each get different tasks without queueing behind each other.
+    """
+    batch = (
+        select(Task.id)
+        .where(Task.status == TaskStatus.PENDING)
+        .order_by(Task.due_date, Task.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Task)
+        .where(Task.id.in_(batch.scalar_subquery()))
+        .values(**_status_values(TaskStatus.IN_PROGRESS))
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claimed(rows) -> List[Row]:
+    """Claimed rows in queue order (RETURNING has no order of its own)."""
+    return sorted(rows, key=lambda row: (row.due_date, row.id))
+
+
+def claim_tasks(db: Session, limit: int = 1) -> List[Row]:
+    """
+    Claim up to `limit` pending tasks, due soonest first, by moving them to
+    IN_PROGRESS. Returns fewer (or none) when the queue runs low.
+    """
+    rows = claimed(db.execute(claim_statement(limit)).all())
+    if rows:
+        changes.record(db, "updated", rows)
+    db.commit()
+    if rows:
+        task_cache.invalidate()
+    return rows
+
+
+def archive_statement(cutoff: datetime, batch_size: int):
+    """
+    DELETE ... RETURNING for up to `batch_size` tasks completed (last
+    changed) before `cutoff`. Rows locked by other transactions are skipped
+    rather than waited for.
+    """
+    batch = (
+        select(Task.id)
+        .where(Task.status == TaskStatus.COMPLETED, Task.updated_at < cutoff)
+        .order_by(Task.updated_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        delete(Task)
+        .where(Task.id.in_(batch.scalar_subquery()))
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def archive_tasks(db: Session, cutoff: datetime, batch_size: int = 1000) -> int:
+    """
+    Move one batch of tasks completed before `cutoff` to the archive table,
+    in its own transaction. Returns how many were moved (fewer than
+    `batch_size` once there is nothing left to archive).
+    """
+    rows = db.execute(archive_statement(cutoff, batch_size)).all()
+    if rows:
+        archived_at = datetime.utcnow()
+        db.execute(insert(ArchivedTask), [{**row._asdict(), "archived_at": archived_at} for row in rows])
+        changes.record(db, "archived", rows)
+    db.commit()
+    if rows:
+        task_cache.invalidate()
+    return len(rows)
 
 
 # Potential function for full task update (if needed later)
@@ -0,0 +1,167 @@
+from datetime import datetime
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from ..core import changes
+from ..models.task import Task
+from ..schemas import task as task_schema
+from ..schemas.task import TaskCreate, TaskFilter, TaskUpdateStatus
+# The statements are shared with the sync CRUD functions so both paths
+# always return the same rows
+from .crud_task import (
+    DEFAULT_SORT,
+    archived_task_statement,
+    claim_statement,
+    claimed,
+    delete_statement,
+    stats_statement,
+    task_cache,
+    tasks_cache_key,
+    task_stats,
+    task_statement,
+    tasks_statement,
+    update_status_statement,
+    use_cache,
+)
+
+# Async counterparts of the functions in crud_task, for use with AsyncSession
+
+
+async def get_task(db: AsyncSession, task_id: int, include_archived: bool = False) -> Optional[Task]:
+    """Get a single task by ID (see crud_task.get_task() for `include_archived`)."""
+    task = (await db.scalars(task_statement(task_id))).first()
+    if task is None and include_archived:
+        return (await db.scalars(archived_task_statement(task_id))).first()
+    return task
+
+
+async def get_tasks(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Task]:
+    """Get a filtered list of tasks in a stable order (see crud_task.tasks_statement())."""
+    statement = tasks_statement(skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    return list((await db.scalars(statement)).all())
+
+
+async def get_task_cached(
+    db: AsyncSession, task_id: int, include_archived: bool = False
+) -> Optional[task_schema.Task]:
+    """Like get_task(), through crud_task.task_cache (returns a schema object)."""
+    if not use_cache(db):
+        return await get_task(db, task_id=task_id, include_archived=include_archived)
+    key = task_cache.key("task", task_id, include_archived)
+    cached = task_cache.get(key)
+    if cached is not None:
+        return cached
+    db_task = await get_task(db, task_id=task_id, include_archived=include_archived)
+    if db_task is None:
+        return None
+    task = task_schema.Task.model_validate(db_task)
+    task_cache.set(key, task)
+    return task
+
+
+async def get_task_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Row]:
+    """Like get_tasks(), but returns plain rows (see crud_task.get_task_rows())."""
+    statement = tasks_statement(skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters, rows=True)
+    return list((await db.execute(statement)).all())
+
+
+async def get_tasks_cached(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    filters: Optional[TaskFilter] = None,
+) -> List[Row]:
+    """Like get_task_rows(), through crud_task.task_cache."""
+    if not use_cache(db):
+        return await get_task_rows(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    key = tasks_cache_key(skip, limit, cursor, sort, filters)
+    cached = task_cache.get(key)
+    if cached is not None:
+        return list(cached)
+    rows = await get_task_rows(db, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters)
+    task_cache.set(key, tuple(rows))
+    return rows
+
+
+async def get_task_stats(db: AsyncSession, now: Optional[datetime] = None) -> task_schema.TaskStats:
+    now = now or datetime.utcnow()
+    return task_stats(await db.execute(stats_statement(now)), now)
+
+
+async def get_task_stats_cached(db: AsyncSession) -> task_schema.TaskStats:
+    """Like get_task_stats(), through crud_task.task_cache."""
+    if not use_cache(db):
+        return await get_task_stats(db)
+    key = task_cache.key("stats")
+    cached = task_cache.get(key)
+    if cached is not None:
+        return cached
+    stats = await get_task_stats(db)
+    task_cache.set(key, stats)
+    return stats
+
+
+async def create_task(db: AsyncSession, task: TaskCreate) -> Task:
+    """Create a new task using data from the TaskCreate schema."""
+    db_task = Task(**task.model_dump())
+    db.add(db_task)
+    await db.flush()
+    changes.record(db, "created", [db_task])
+    await db.commit()
+    task_cache.invalidate()
+    await db.refresh(db_task)
+    return db_task
+
+
+async def update_task_status(
+    db: AsyncSession, task_id: int, task_update: TaskUpdateStatus, expected_version: Optional[int] = None
+) -> Optional[Row]:
+    """
+    Update the status of a task with a single UPDATE ... RETURNING; None if
+    not found (or no longer at `expected_version`).
+    """
+    row = (await db.execute(update_status_statement(task_id, task_update.status, expected_version))).first()
+    if row is not None:
+        changes.record(db, "updated", [row])
+    await db.commit()
+    task_cache.invalidate()
+    return row
+
+
+async def delete_task(db: AsyncSession, task_id: int) -> Optional[Row]:
+    """Delete a task by ID with a single DELETE ... RETURNING; None if not found."""
+    row = (await db.execute(delete_statement(task_id))).first()
+    if row is not None:
+        changes.record(db, "deleted", [row])
+    await db.commit()
+    task_cache.invalidate()
+    return row
+
+
+async def claim_tasks(db: AsyncSession, limit: int = 1) -> List[Row]:
+    """Claim up to `limit` pending tasks (see crud_task.claim_tasks())."""
+    rows = claimed((await db.execute(claim_statement(limit))).all())
+    if rows:
+        changes.record(db, "updated", rows)
+    await db.commit()
+    if rows:
+        task_cache.invalidate()
+    return rows
@@ -0,0 +1,57 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or doesn't match the query."""
+
+
+def _dump_value(value: Any) -> Any:
+    # JSON has no datetime type, so tag it to get the same type back on decode
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if hasattr(value, "value"):  # Enums (e.g. TaskStatus) are keyed on their value
+        return value.value
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        try:
+            return datetime.fromisoformat(value["dt"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+    return value
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """
+    Build an opaque cursor pointing just after the row (value, last_id) in
+    the ordering named by `sort`.
+    """
+    payload = {"s": sort, "v": _dump_value(value), "i": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor() into (value, last_id).
+
+    The cursor must have been issued for the same `sort`, otherwise the
+    keyset comparison would be meaningless.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("i"), int):
+        raise InvalidCursorError("Invalid cursor")
+    if payload.get("s") != sort:
+        raise InvalidCursorError("Cursor was issued for a different sort order")
+    return _load_value(payload.get("v")), payload["i"]
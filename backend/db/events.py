@@ -0,0 +1,30 @@
+import time
+
+from sqlalchemy import event
+
+from ..core.metrics import DB_QUERIES, DB_QUERY_SECONDS, current_route
+
+
+def _operation(statement: str) -> str:
+    """Statement type (SELECT, INSERT, ...) for metric labels."""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_queries(engine, name: str) -> None:
+    """
+    Count and time every statement run through `engine` (sync or async),
+    labelled with the engine name, the route being served and the statement
+    type.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        labels = (name, current_route(), _operation(statement))
+        DB_QUERIES.labels(*labels).inc()
+        DB_QUERY_SECONDS.labels(*labels).observe(time.perf_counter() - context._query_start)
@@ -0,0 +1,137 @@
+import logging
+from contextlib import AsyncExitStack, ExitStack
+from typing import Tuple
+
+import anyio
+from sqlalchemy import text
+
+from ..core import config
+from ..crud.crud_task import task_statement, tasks_statement
+from .pool import under_pressure
+from .session import get_databases
+
+logger = logging.getLogger(__name__)
+
+# Startup warm-up and the readiness check behind GET /health/ready.
+#
+# A worker fresh out of startup would otherwise open its pool's connections
+# (and compile its statements) on the first requests it is sent. The lifespan
+# in main.py runs warm_up() first, and the worker reports ready only once it
+# has succeeded, so a rolling deploy only routes traffic to warmed workers.
+
+_warmed = False
+
+
+def warm_up_statements() -> list:
+    """
+    The hottest reads (task list and single task). Running them once on each
+    warmed connection fills SQLAlchemy's compiled statement cache and, with
+    asyncpg, the connection's prepared statement cache.
+    """
+    return [tasks_statement(limit=1, rows=True), task_statement(0)]
+
+
+def _connections_to_open(engine, connections: int) -> int:
+    pool = getattr(engine, "sync_engine", engine).pool
+    # NullPool (external pooler) keeps nothing: one connection checks connectivity
+    if not hasattr(pool, "checkedout"):
+        return 1
+    return max(1, min(connections, pool.size()))
+
+
+def _warm_up_engine(engine, connections: int) -> None:
+    # Held all at once, so the pool has to open that many
+    with ExitStack() as stack:
+        held = [stack.enter_context(engine.connect()) for _ in range(_connections_to_open(engine, connections))]
+        for connection in held:
+            for statement in warm_up_statements():
+                connection.execute(statement)
+
+
+async def _warm_up_async_engine(engine, connections: int) -> None:
+    async with AsyncExitStack() as stack:
+        held = [
+            await stack.enter_async_context(engine.connect())
+            for _ in range(_connections_to_open(engine, connections))
+        ]
+        for connection in held:
+            for statement in warm_up_statements():
+                await connection.execute(statement)
+
+
+async def warm_up(connections: int = config.DB_POOL_WARMUP) -> None:
+    """
+    Open and prime up to `connections` connections in each pool serving
+    requests (none if `connections` is 0). Raises if the primary can't be
+    reached; a replica that can't is only logged.
+    """
+    global _warmed
+    primary, *replicas = get_databases().request_engines()
+    if connections > 0:
+        await _warm_up(primary, connections)
+        for replica in replicas:
+            try:
+                await _warm_up(replica, connections)
+            except Exception as e:
+                logger.warning("Could not warm up %s: %s", replica.url.render_as_string(), e)
+    _warmed = True
+
+
+async def _warm_up(engine, connections: int) -> None:
+    if hasattr(engine, "sync_engine"):
+        await _warm_up_async_engine(engine, connections)
+    else:
+        # Abandoned if cancelled (readiness timeout); the connections go back when it's done
+        await anyio.to_thread.run_sync(_warm_up_engine, engine, connections, abandon_on_cancel=True)
+
+
+def _ping(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _ping_async(engine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def pool_status(engine) -> dict:
+    """Connections in use and available in `engine`'s pool, and whether it is under pressure."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"under_pressure": under_pressure(engine)}
+    if hasattr(pool, "checkedout"):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+    return status
+
+
+async def readiness(timeout: float = config.HEALTH_CHECK_TIMEOUT) -> Tuple[bool, dict]:
+    """
+    (ready, report) for this worker. It is ready once warm_up() has succeeded
+    (retried here until it does) and the primary answers a query within
+    `timeout` seconds. A pool under pressure is reported but doesn't make the
+    worker unready: every worker shares the database, so taking them all out
+    of rotation would only turn slowness into an outage (admission control
+    sheds that load instead).
+    """
+    report = {"status": "ready"}
+    try:
+        engine = get_databases().request_engine
+        report["pool"] = pool_status(engine)
+        with anyio.fail_after(timeout):
+            if not _warmed:
+                await warm_up()
+            elif hasattr(engine, "sync_engine"):
+                await _ping_async(engine)
+            else:
+                # Abandoned on timeout: it may be stuck waiting for a connection
+                await anyio.to_thread.run_sync(_ping, engine, abandon_on_cancel=True)
+    except TimeoutError:
+        report.update(status="unavailable", detail=f"Database did not respond within {timeout:g}s")
+    except ValueError as e:
+        # Missing configuration (see db.session.Databases)
+        report.update(status="unavailable", detail=str(e))
+    except Exception as e:
+        report.update(status="unavailable", detail=f"Database check failed: {e.__class__.__name__}")
+    if report["status"] != "ready" and not _warmed:
+        report["status"] = "warming_up"
+    return report["status"] == "ready", report
@@ -0,0 +1,109 @@
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from alembic import op
+from alembic.config import Config
+from sqlalchemy import func, select, text
+from sqlalchemy.sql import ColumnElement, TableClause
+
+# Helpers for migration scripts (migrations/versions) that change large,
+# busy tables without holding locks that block writes for long.
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Alembic config for the backend's migrations, optionally for another database."""
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.attributes["configure_logger"] = False
+    if url:
+        cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return cfg
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence, **kw) -> None:
+    """
+    op.create_index() that doesn't block writes on PostgreSQL: the index is
+    built CONCURRENTLY, which can't run inside a transaction, so the
+    migration's transaction is committed first. An invalid index left behind
+    by an earlier failed attempt is dropped and rebuilt. Other databases get
+    a plain CREATE INDEX.
+    """
+    if not _is_postgresql():
+        op.create_index(name, table, columns, **kw)
+        return
+    with op.get_context().autocommit_block():
+        # (Nothing can be looked up when only generating SQL with --sql)
+        invalid = not op.get_context().as_sql and op.get_bind().execute(
+            text("SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                 "WHERE c.relname = :name AND NOT i.indisvalid"),
+            {"name": name},
+        ).scalar()
+        if invalid:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """op.drop_index() without blocking reads and writes on PostgreSQL."""
+    if not _is_postgresql():
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def batched_backfill(
+    table: TableClause, values: dict, where: ColumnElement, batch_size: int = 5000, pause: float = 0.0
+) -> int:
+    """
+    UPDATE `table` SET `values` for the rows matching `where`, `batch_size`
+    rows per transaction, so row locks are short-lived and replicas and
+    vacuum keep up. `where` must stop matching a row once it is updated
+    (e.g. `column IS NULL`). `table` needs an `id` column: batches walk it
+    in order, each starting after the last id of the previous one, so no
+    batch rescans rows already updated. Returns the number of rows updated.
+    """
+    if op.get_context().as_sql:
+        # Generating SQL (--sql): batches can't be counted, emit one UPDATE
+        op.execute(table.update().where(where).values(**values))
+        return 0
+    bind = op.get_bind()
+    total, last_id = 0, None
+    with op.get_context().autocommit_block():
+        while True:
+            after_last = [where] if last_id is None else [table.c.id > last_id, where]
+            batch = select(table.c.id).where(*after_last).order_by(table.c.id).limit(batch_size).subquery()
+            upper, count = bind.execute(select(func.max(batch.c.id), func.count())).one()
+            if not count:
+                return total
+            rows = table.update().where(*after_last, table.c.id <= upper).values(**values)
+            total += bind.execute(rows).rowcount
+            last_id = upper
+            if count < batch_size:
+                return total
+            if pause:
+                time.sleep(pause)
+
+
+def set_not_null(table: str, column: str, existing_type) -> None:
+    """
+    ALTER COLUMN ... SET NOT NULL. On PostgreSQL a NOT VALID check
+    constraint is validated first (without blocking writes), which lets SET
+    NOT NULL skip its full-table scan under an exclusive lock (PostgreSQL 12+).
+    """
+    if not _is_postgresql():
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(column, existing_type=existing_type, nullable=False)
+        return
+    constraint = f"{table}_{column}_not_null"
+    op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{constraint}" CHECK ("{column}" IS NOT NULL) NOT VALID')
+    with op.get_context().autocommit_block():
+        op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{constraint}"')
+    op.alter_column(table, column, existing_type=existing_type, nullable=False)
+    op.drop_constraint(constraint, table, type_="check")
@@ -0,0 +1,68 @@
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from ..core import config
+from ..core.metrics import POOL_CHECKOUT_SECONDS, POOL_CHECKOUT_TIMEOUTS
+
+# A pool whose checkouts took longer than ADMISSION_POOL_WAIT_BUDGET within
+# this many seconds is considered slow (see under_pressure())
+SLOW_CHECKOUT_WINDOW = 1.0
+
+# Pool name -> time.monotonic() of its last checkout over budget
+_last_slow_checkout: Dict[str, float] = {}
+
+
+class _InstrumentedPoolMixin:
+    """
+    Records how long each checkout takes and how many time out. The pool is
+    labelled with its logging name (engine's `pool_logging_name`), which
+    SQLAlchemy carries over when the pool is recreated.
+    """
+
+    def connect(self):
+        name = self.logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            POOL_CHECKOUT_SECONDS.labels(name).observe(elapsed)
+            if elapsed > config.ADMISSION_POOL_WAIT_BUDGET:
+                _last_slow_checkout[name] = time.monotonic()
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def under_pressure(engine) -> bool:
+    """
+    True while `engine`'s pool can't keep up: a checkout recently waited
+    longer than ADMISSION_POOL_WAIT_BUDGET and every connection is in use.
+    Both are read live, so it clears as soon as connections are returned.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    name = pool.logging_name or "default"
+    if time.monotonic() - _last_slow_checkout.get(name, float("-inf")) > SLOW_CHECKOUT_WINDOW:
+        return False
+    # Our pools are created with DB_MAX_OVERFLOW (see session.engine_options());
+    # -1 means unlimited, which like NullPool leaves slow checkouts as the
+    # only signal
+    max_overflow = config.DB_MAX_OVERFLOW
+    if max_overflow < 0 or not hasattr(pool, "checkedout"):
+        return True
+    return pool.checkedout() >= pool.size() + max_overflow
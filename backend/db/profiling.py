@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from ..core.metrics import current_route, current_scope
+
+logger = logging.getLogger(__name__)
+
+# Key under which the per-request query log is kept in the ASGI scope
+SCOPE_KEY = "taskapi.queries"
+
+# EXPLAIN prefix per dialect; statements on other dialects are logged without a plan
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+# On PostgreSQL a failed statement aborts the whole transaction, so the
+# EXPLAIN runs in this savepoint: a failure only rolls the savepoint back,
+# never the request's own transaction
+EXPLAIN_SAVEPOINT = "taskapi_explain"
+
+
+def _truncate(text: str, limit: int = 500) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class QueryProfiler:
+    """
+    Debug aid hooked onto the engines' cursor events:
+
+    - statements slower than `slow_query_ms` are logged with their parameters
+      and EXPLAIN plan;
+    - a request issuing more than `max_queries` statements is logged once
+      with a summary of what it ran (repeated statements point at N+1 loops).
+
+    The listeners are only attached while profiling is enabled, so the query
+    path costs nothing when it is off. Per-request counts rely on the request
+    scope published by MetricsMiddleware.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.slow_query_ms = 200.0
+        self.max_queries = 10
+        self._engines: List = []
+        self._lock = threading.Lock()
+
+    def register(self, engine) -> None:
+        """Profile `engine` (sync or async) whenever profiling is enabled."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        with self._lock:
+            self._engines.append(sync_engine)
+            if self.enabled:
+                self._attach(sync_engine)
+
+    def enable(self, slow_query_ms: Optional[float] = None, max_queries: Optional[int] = None) -> None:
+        with self._lock:
+            if slow_query_ms is not None:
+                self.slow_query_ms = slow_query_ms
+            if max_queries is not None:
+                self.max_queries = max_queries
+            if not self.enabled:
+                for engine in self._engines:
+                    self._attach(engine)
+                self.enabled = True
+
+    def disable(self) -> None:
+        with self._lock:
+            if self.enabled:
+                for engine in self._engines:
+                    event.remove(engine, "before_cursor_execute", self._before_execute)
+                    event.remove(engine, "after_cursor_execute", self._after_execute)
+                self.enabled = False
+
+    def _attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._profile_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Listeners can be attached mid-statement; ignore statements started before that
+        start = getattr(context, "_profile_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= self.slow_query_ms:
+            self._log_slow_query(conn, statement, parameters, executemany, elapsed_ms)
+        self._count_request_query(statement)
+
+    def _log_slow_query(self, conn, statement, parameters, executemany, elapsed_ms) -> None:
+        plan = None
+        prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if prefix and not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            savepoint = conn.dialect.name == "postgresql" and conn.in_transaction()
+            try:
+                # A raw DBAPI cursor, so the EXPLAIN doesn't go through these events again
+                explain_cursor = conn.connection.cursor()
+                try:
+                    if savepoint:
+                        explain_cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                    try:
+                        explain_cursor.execute(prefix + statement, parameters)
+                        plan = "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+                    except Exception:
+                        if savepoint:
+                            explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                        raise
+                    if savepoint:
+                        explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                finally:
+                    explain_cursor.close()
+            except Exception as e:  # The plan is best effort; never fail the real query
+                logger.warning("EXPLAIN failed for a slow query: %s", e)
+                plan = f"<EXPLAIN failed: {e}>"
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s\nParameters: %s\nPlan:\n%s",
+            elapsed_ms, current_route(), statement, _truncate(repr(parameters)), plan or "<not available>",
+        )
+
+    def _count_request_query(self, statement) -> None:
+        scope = current_scope.get()
+        if scope is None:
+            return
+        queries = scope.setdefault(SCOPE_KEY, [])
+        queries.append(statement)
+        # Log once, when the request first goes over the limit
+        if len(queries) == self.max_queries + 1:
+            repeated = Counter(queries).most_common(3)
+            summary = "\n".join(f"  {count}x {_truncate(' '.join(text.split()), 200)}" for text, count in repeated)
+            logger.warning(
+                "%s %s issued more than %d queries; most repeated so far:\n%s",
+                scope.get("method"), current_route(), self.max_queries, summary,
+            )
+
+
+query_profiler = QueryProfiler()
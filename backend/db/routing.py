@@ -0,0 +1,54 @@
+import itertools
+import time
+from typing import Mapping
+
+from ..core import config
+from . import session as db_session
+
+# Read replica routing. Read-only task routes take their session from
+# replica_session_factory(), writes always use the primary.
+#
+# Replicas lag behind the primary, so a client could write and then not see
+# its change on the next read. After every successful write the client gets a
+# short-lived cookie (set by middleware/read_your_writes.py) and, while it
+# holds it, its reads go to the primary too.
+
+PRIMARY_COOKIE = "taskapi_primary_until"
+
+_turn = itertools.count()
+
+
+def replicas_enabled() -> bool:
+    return bool(config.DATABASE_REPLICA_URLS)
+
+
+def primary_cookie() -> str:
+    """Set-Cookie value pinning the client to the primary for READ_YOUR_WRITES_SECONDS."""
+    window = config.READ_YOUR_WRITES_SECONDS
+    until = time.time() + window
+    return f"{PRIMARY_COOKIE}={until:.0f}; Max-Age={window:.0f}; Path=/; HttpOnly; SameSite=Lax"
+
+
+def pinned_to_primary(cookies: Mapping[str, str]) -> bool:
+    """True if the client wrote recently enough that it must read from the primary."""
+    value = cookies.get(PRIMARY_COOKIE)
+    if value is None:
+        return False
+    try:
+        # The expiry is checked here as well: Max-Age is only honoured by browsers
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def replica_session_factory(cookies: Mapping[str, str], is_async: bool = False):
+    """
+    Session factory of the replica to read from (taken in turn), or None if
+    the read must go to the primary: there are no replicas, or the client is
+    pinned to it.
+    """
+    if not replicas_enabled() or pinned_to_primary(cookies):
+        return None
+    databases = db_session.get_databases()
+    replicas = databases.AsyncReplicaSessions if is_async else databases.ReplicaSessions
+    return replicas[next(_turn) % len(replicas)]
@@ -1,15 +1,197 @@
+import os
+import threading
+from typing import Optional
+from uuid import uuid4
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from ..core.config import DATABASE_URL
+from ..core import config
+from ..core.config import ASYNC_DATABASE_URL, DATABASE_URL, DB_ASYNC
+from ..core.metrics import pool_collector
+from .events import instrument_queries
+from .pool import InstrumentedAsyncQueuePool, InstrumentedNullPool, InstrumentedQueuePool
+from .profiling import query_profiler
+
+# Async drivers to use in place of the sync ones from DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def make_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def unique_statement_name() -> str:
+    """
+    Name for each statement asyncpg prepares. Behind a transaction-mode
+    pooler the next transaction may run on a server connection that already
+    has a statement of the same name, so names must never be reused.
+    """
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(name: str, is_async: bool = False) -> dict:
+    """
+    Keyword arguments for create_engine()/create_async_engine() with the
+    pool settings from core/config.py. `name` labels the pool in metrics.
+    """
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
+    if config.DB_EXTERNAL_POOLER:
+        # pgbouncer (transaction mode) does the pooling; holding connections
+        # here as well would pin server connections to idle workers
+        options["poolclass"] = InstrumentedNullPool
+        if is_async:
+            # Prepared statements don't survive being moved between server
+            # connections: turn off asyncpg's statement cache and SQLAlchemy's
+            # own one on top of it, and give each statement a unique name
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": unique_statement_name,
+            }
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _instrumented(engine, name: str):
+    pool_collector.register(name, engine)
+    instrument_queries(engine, name)
+    query_profiler.register(engine)
+    return engine
+
+
+class Databases:
+    """
+    The engines and session factories of the app: the primary database, its
+    async counterpart when DB_ASYNC is enabled, and the read replicas. None of
+    this connects; pools open connections on first use (or in warm-up, see
+    db/health.py).
+    """
+
+    def __init__(self) -> None:
+        if not DATABASE_URL:
+            raise ValueError("DATABASE_URL is not set in the environment variables.")
+
+        self.engine = _instrumented(create_engine(DATABASE_URL, **engine_options("primary")), "primary")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        # Async engine and session factory, only created when the async path
+        # is enabled so the async driver isn't required otherwise
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if DB_ASYNC:
+            self.async_engine = _instrumented(
+                create_async_engine(
+                    ASYNC_DATABASE_URL or make_async_url(DATABASE_URL), **engine_options("async", is_async=True)
+                ),
+                "async",
+            )
+            # expire_on_commit=False: attributes can't be lazily reloaded once
+            # the response is being serialized outside the session's await points
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+        # Read replicas: one engine (and pool) per URL, plus async ones when
+        # DB_ASYNC is enabled. Read-only routes pick one per request (see
+        # db/routing.py).
+        self.replica_engines = []
+        self.async_replica_engines = []
+        self.ReplicaSessions = []
+        self.AsyncReplicaSessions = []
+        for index, replica_url in enumerate(config.DATABASE_REPLICA_URLS):
+            name = f"replica{index}"
+            replica_engine = _instrumented(create_engine(replica_url, **engine_options(name)), name)
+            self.replica_engines.append(replica_engine)
+            self.ReplicaSessions.append(sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+            if DB_ASYNC:
+                async_replica_engine = _instrumented(
+                    create_async_engine(make_async_url(replica_url), **engine_options(f"{name}-async", is_async=True)),
+                    f"{name}-async",
+                )
+                self.async_replica_engines.append(async_replica_engine)
+                self.AsyncReplicaSessions.append(
+                    async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+                )
+
+    @property
+    def request_engine(self):
+        """The primary engine the task routes use: the async one when DB_ASYNC is enabled."""
+        return self.async_engine if self.async_engine is not None else self.engine
+
+    def request_engines(self) -> list:
+        """Engines serving requests: request_engine and the replicas of the same kind."""
+        if self.async_engine is not None:
+            return [self.async_engine, *self.async_replica_engines]
+        return [self.engine, *self.replica_engines]
+
+    def all_engines(self) -> list:
+        engines = [self.engine, self.async_engine, *self.replica_engines, *self.async_replica_engines]
+        return [each for each in engines if each is not None]
+
+    async def dispose(self) -> None:
+        """Close every pooled connection (on shutdown)."""
+        for each in self.all_engines():
+            if hasattr(each, "sync_engine"):
+                await each.dispose()
+            else:
+                each.dispose()
+
+
+# Created on first use rather than on import, so importing the app (tests,
+# tooling, the server's parent process) needs neither a database nor
+# DATABASE_URL
+_databases: Optional[Databases] = None
+_databases_lock = threading.Lock()
+
+
+def get_databases() -> Databases:
+    """The app's Databases, created on the first call."""
+    global _databases
+    if _databases is None:
+        # Sync routes run in the threadpool: only one of them may create them
+        with _databases_lock:
+            if _databases is None:
+                _databases = Databases()
+    return _databases
+
+
+async def dispose_databases() -> None:
+    """Close the pooled connections on shutdown, if the engines were ever created."""
+    if _databases is not None:
+        await _databases.dispose()
+
+
+def _dispose_pools_after_fork() -> None:
+    # A forked child (e.g. gunicorn --preload) must not use connections
+    # inherited from its parent: give it empty pools. close=False leaves the
+    # parent's connections alone.
+    if _databases is None:
+        return
+    for each in _databases.all_engines():
+        getattr(each, "sync_engine", each).dispose(close=False)
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL is not set in the environment variables.")
 
-# Create the SQLAlchemy engine
-# connect_args are often needed for SQLite, but generally not for PostgreSQL
-# For PostgreSQL, pool_pre_ping=True is often a good idea in production
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+os.register_at_fork(after_in_child=_dispose_pools_after_fork)
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) 
\ No newline at end of file
+if config.QUERY_PROFILING:
+    query_profiler.enable(slow_query_ms=config.SLOW_QUERY_MS, max_queries=config.MAX_QUERIES_PER_REQUEST)
@@ -1,21 +1,33 @@
 import logging
 
-from backend.db.session import engine
-from backend.db.base_class import Base # Import Base
-from backend.models.task import Task # Import models to ensure they are registered
+from alembic import command
+from sqlalchemy import inspect
+
+from backend.db.session import get_databases
+from backend.db.migrations import alembic_config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Revision matching the schema create_all() used to produce, before migrations
+BASELINE_REVISION = "0001"
+
 def init_db() -> None:
-    logger.info("Creating initial database tables...")
+    logger.info("Migrating the database schema to the latest revision...")
+    engine = get_databases().engine
     try:
-        # Create all tables defined in models imported via Base
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully.")
+        cfg = alembic_config(engine.url.render_as_string(hide_password=False))
+        tables = inspect(engine).get_table_names()
+        if "tasks" in tables and "alembic_version" not in tables:
+            # Created by create_all() before migrations existed: record it as
+            # the baseline so only the later migrations run
+            logger.info("Existing tables without migration history; stamping revision %s", BASELINE_REVISION)
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, "head")
+        logger.info("Database schema is up to date.")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error(f"Error migrating the database: {e}")
         raise
 
 if __name__ == "__main__":
-    init_db() 
\ No newline at end of file
+    init_db()
@@ -0,0 +1,66 @@
+"""
+Move completed tasks that haven't changed for a while out of the hot `tasks`
+table into `tasks_archive`:
+
+    python -m backend.jobs.archive                 # once, e.g. from cron
+    python -m backend.jobs.archive --interval 3600 # keep running
+
+Each batch is its own short transaction and locked rows are skipped, so it
+can run alongside the API; --pause spaces batches out to limit the load.
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from ..core import config
+from ..crud import crud_task
+from ..db.session import get_databases
+
+logger = logging.getLogger(__name__)
+
+
+def archive_completed(
+    older_than_days: int = config.ARCHIVE_AFTER_DAYS,
+    batch_size: int = config.ARCHIVE_BATCH_SIZE,
+    pause: float = 0.0,
+    session_factory=None,
+) -> int:
+    """Archive everything eligible, batch by batch. Returns the number of tasks moved."""
+    session_factory = session_factory or get_databases().SessionLocal
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = 0
+    with session_factory() as db:
+        while True:
+            moved = crud_task.archive_tasks(db=db, cutoff=cutoff, batch_size=batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    logger.info("Archived %d tasks completed before %s", total, cutoff.isoformat())
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive old completed tasks.")
+    parser.add_argument("--days", type=int, default=config.ARCHIVE_AFTER_DAYS,
+                        help=f"Archive tasks completed more than this many days ago (default: {config.ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=config.ARCHIVE_BATCH_SIZE,
+                        help=f"Tasks moved per transaction (default: {config.ARCHIVE_BATCH_SIZE})")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to wait between batches")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="Run again every this many seconds instead of exiting")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        archive_completed(args.days, args.batch_size, args.pause)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
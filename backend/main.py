@@ -1,11 +1,63 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import the main API router
 from .api.v1.api import api_router
+from .core import config
+from .core.metrics import render_metrics
+from .db import health, routing, session as db_session
+from .middleware import admission
+from .middleware.admission import AdmissionMiddleware
+from .middleware.coalescing import CoalescingMiddleware
+from .middleware.compression import CompressionMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.read_your_writes import ReadYourWritesMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the pools before the worker starts taking requests. If the
+    # database isn't reachable (or doesn't answer within
+    # DB_POOL_WARMUP_TIMEOUT) the worker still starts, so liveness checks
+    # pass, but only reports ready once a later readiness check has warmed it up.
+    try:
+        with anyio.fail_after(config.DB_POOL_WARMUP_TIMEOUT):
+            await health.warm_up()
+    except TimeoutError:
+        logger.warning(
+            "Database warm-up timed out after %gs, will retry on readiness checks", config.DB_POOL_WARMUP_TIMEOUT
+        )
+    except Exception as e:
+        logger.warning("Database warm-up failed, will retry on readiness checks: %s", e)
+    yield
+    await db_session.dispose_databases()
+
 
 # Create the FastAPI app instance
-app = FastAPI(title="HMCTS Task Management API", version="0.1.0")
+app = FastAPI(title="HMCTS Task Management API", version="0.1.0", lifespan=lifespan)
+
+# Limit concurrent requests per route and shed load with 503s when the
+# database can't keep up. Added first (innermost) so rejections still get
+# CORS headers and are counted by the metrics middleware.
+if config.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        router=app.router,
+        get_engine=lambda: db_session.get_databases().request_engine,
+        concurrency=config.ADMISSION_CONCURRENCY,
+        queue_size=config.ADMISSION_QUEUE_SIZE,
+        queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+        retry_after=config.ADMISSION_RETRY_AFTER,
+        route_limits=config.ADMISSION_ROUTE_LIMITS,
+    )
 
 # Set up CORS (Cross-Origin Resource Sharing)
 # Adjust origins as needed for production deployments
@@ -21,18 +73,79 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],  # Let the browser read these response headers
 )
 
+# Compress large responses (list pages, exports) for clients that accept it
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware, encodings=config.COMPRESSION_ENCODINGS, minimum_size=config.COMPRESSION_MIN_SIZE
+    )
+
+# Pin clients to the primary database after they write, while reads go to replicas
+if routing.replicas_enabled():
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Identical concurrent reads share one query and response (outside
+# compression and admission, so followers reuse the compressed body and
+# don't take a slot)
+if config.COALESCE_ENABLED:
+    app.add_middleware(CoalescingMiddleware, router=app.router)
+
+# Record request counts and latencies (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware)
+
 # Include the API router
 # All routes defined in api_router will be available under /api/v1
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.exception_handler(exc.TimeoutError)
+async def pool_timeout_handler(request: Request, e: exc.TimeoutError):
+    """
+    No database connection came free within DB_POOL_TIMEOUT: the database is
+    overloaded, so ask the client to come back rather than report an error.
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": admission.BUSY_DETAIL},
+        headers={"Retry-After": str(config.ADMISSION_RETRY_AFTER)},
+    )
+
 @app.get("/", tags=["Root"])
+@admission.exempt
 async def read_root():
     """
     Root endpoint to check if the API is running.
     """
     return {"message": "Welcome to the HMCTS Task Management API"}
 
+@app.get("/metrics", include_in_schema=False)
+@admission.exempt
+def read_metrics():
+    """
+    Prometheus scrape endpoint (request, query, pool and cache metrics).
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/live", tags=["Health"])
+@admission.exempt
+async def liveness():
+    """
+    Liveness probe: the worker is up and its event loop responsive. It doesn't
+    touch the database, so a database outage doesn't get workers restarted.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+@admission.exempt
+async def readiness():
+    """
+    Readiness probe: 200 once this worker's pools are warmed up and the
+    database answers within HEALTH_CHECK_TIMEOUT, 503 otherwise (see db/health.py).
+    """
+    ready, report = await health.readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
 # Add other app setup here if needed, e.g., exception handlers 
\ No newline at end of file
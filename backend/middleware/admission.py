@@ -0,0 +1,162 @@
+import asyncio
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi.routing import APIRoute
+
+from ..core.metrics import ADMISSION_QUEUED, ADMISSION_REJECTIONS
+from ..db.pool import under_pressure
+from .routes import match_route
+
+# Body of the 503s sent when shedding load
+BUSY_DETAIL = "Service is busy, please retry shortly"
+
+# Methods treated as reads: shed first when the database falls behind
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+def exempt(endpoint: Callable) -> Callable:
+    """Decorator for routes admission control must never limit (health checks, long-lived streams)."""
+    endpoint.admission_exempt = True
+    return endpoint
+
+
+class RouteGate:
+    """
+    Concurrency limit for one route: up to `limit` requests at a time, then
+    up to `queue_size` waiting in arrival order. Used from a single event loop.
+    """
+
+    def __init__(self, limit: int, queue_size: int) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters: deque = deque()
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    def queue_full(self) -> bool:
+        return len(self._waiters) >= self.queue_size
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False if none came free."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.inc()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(waiter)
+        except asyncio.CancelledError:
+            # Client went away while waiting
+            if self._abandon(waiter):
+                self.release()
+            raise
+        finally:
+            ADMISSION_QUEUED.dec()
+
+    def _abandon(self, waiter) -> bool:
+        # A slot handed over just as the wait ended is kept
+        if waiter.done():
+            return True
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        return False
+
+    def release(self) -> None:
+        # Hand the slot straight to the longest waiting request, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """
+    ASGI admission control for the API routes, so a slow database turns into
+    fast 503s (with Retry-After) instead of requests piling up in the
+    threadpool and on pool checkouts until everything times out.
+
+    Each route (method + path template) gets a RouteGate. A request that finds
+    its route busy queues for up to `queue_timeout` seconds if there is room
+    in the queue, and is rejected otherwise. Reads are shed first: while
+    the engine's pool is under pressure (see db.pool.under_pressure()), new
+    reads are rejected outright and only writes are admitted (`get_engine`
+    returns the engine, so it is only created once requests arrive). Routes
+    that aren't APIRoutes (docs) or are marked with exempt() pass through.
+    """
+
+    def __init__(
+        self,
+        app,
+        router,
+        get_engine: Callable[[], object],
+        concurrency: int,
+        queue_size: int,
+        queue_timeout: float,
+        retry_after: int = 1,
+        route_limits: Optional[Dict[Tuple[str, str], int]] = None,
+    ) -> None:
+        self.app = app
+        self.router = router
+        self.get_engine = get_engine
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.route_limits = route_limits or {}
+        self._gates: Dict[Tuple[str, str], RouteGate] = {}
+
+    def _gate(self, method: str, path: str) -> RouteGate:
+        key = (method, path)
+        gate = self._gates.get(key)
+        if gate is None:
+            gate = self._gates[key] = RouteGate(self.route_limits.get(key, self.concurrency), self.queue_size)
+        return gate
+
+    async def __call__(self, scope, receive, send):
+        route = match_route(self.router, scope) if scope["type"] == "http" else None
+        if not isinstance(route, APIRoute) or getattr(route.endpoint, "admission_exempt", False):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        gate = self._gate(method, route.path)
+        reason = None
+        if method in READ_METHODS and under_pressure(self.get_engine()):
+            # It would only wait for a connection the writes need
+            reason = "pool_pressure"
+        elif not gate.try_acquire():
+            if gate.queue_full():
+                reason = "queue_full"
+            elif not await gate.wait(self.queue_timeout):
+                reason = "queue_timeout"
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels(method, route.path, reason).inc()
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, send) -> None:
+        body = orjson.dumps({"detail": BUSY_DETAIL})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.requests import HTTPConnection
+
+from ..core.metrics import COALESCED_REQUESTS
+from ..db import routing
+from .routes import match_route
+
+# Request headers the response can depend on (negotiated encoding,
+# conditional GETs, CORS); requests only share a response if these match
+KEY_HEADERS = (b"accept-encoding", b"if-none-match", b"origin")
+
+# Bumped whenever any session commits, i.e. after every write in this
+# process. A request only joins a read that started in the same epoch, so it
+# never gets a response read from before a write that had already committed.
+_commits = itertools.count(1)
+_epoch = 0
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_epoch(session: Session) -> None:
+    global _epoch
+    _epoch = next(_commits)
+
+
+def coalesce(endpoint: Callable) -> Callable:
+    """Decorator for read routes whose identical concurrent requests may share one response."""
+    endpoint.coalesce = True
+    return endpoint
+
+
+def request_key(scope, route_path: str) -> Tuple:
+    """What makes two GETs to the same route interchangeable: normalized query and the KEY_HEADERS."""
+    query = tuple(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+    headers = tuple(sorted((name, value) for name, value in scope["headers"] if name in KEY_HEADERS))
+    return (route_path, scope["path"], query, headers, _epoch)
+
+
+class CoalescingMiddleware:
+    """
+    ASGI middleware collapsing identical concurrent GETs to routes marked
+    with coalesce(): the first request runs, and requests that arrive while
+    it is in flight wait and are sent a copy of its response (status,
+    headers and the already serialized body) instead of each running the
+    same query.
+
+    Writes aren't coalesced, and a commit starts a new epoch so later reads
+    run afresh. Clients pinned to the primary after a write (db/routing.py)
+    always run their own read. If the shared request fails, the waiting ones
+    run on their own.
+    """
+
+    def __init__(self, app, router) -> None:
+        self.app = app
+        self.router = router
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        route = match_route(self.router, scope)
+        if not getattr(getattr(route, "endpoint", None), "coalesce", False) or (
+            routing.pinned_to_primary(HTTPConnection(scope).cookies)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = request_key(scope, route.path)
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            # shield(): a waiter going away mustn't cancel the shared future
+            shared = await asyncio.shield(leader)
+            if shared is not None:
+                COALESCED_REQUESTS.labels(route.path, "shared").inc()
+                # Lets the metrics middleware label it like the request that ran
+                scope["route"] = route
+                for message in shared:
+                    await send(message)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        messages: List[dict] = []
+
+        async def send_wrapper(message):
+            messages.append(message)
+            await send(message)
+
+        COALESCED_REQUESTS.labels(route.path, "executed").inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            future.set_result(None)
+            raise
+        else:
+            future.set_result(messages)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
@@ -0,0 +1,223 @@
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional: br is only offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd is only offered when installed
+    zstandard = None
+
+# Content types worth compressing (prefix match); anything else (images,
+# archives, already-compressed data) is sent as is
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/openmetrics-text")
+# Never compressed: server-sent events must reach the client as soon as each
+# event is written, and a compressor (or a proxy decompressing) could hold them back
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush: everything so far can be decoded before the next chunk arrives
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Encoding -> (compressor, default level), for the encodings available here.
+# The levels favour speed: responses are compressed on every request.
+ENCODERS: Dict[str, tuple] = {"gzip": (_Gzip, 6)}
+if brotli is not None:
+    ENCODERS["br"] = (_Brotli, 4)
+if zstandard is not None:
+    ENCODERS["zstd"] = (_Zstd, 3)
+
+
+# Content codings that may be appended to an ETag (see encoded_etag())
+ETAG_CODINGS = ("gzip", "br", "zstd")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the `encoding`-coded version of a response: different codings are
+    different bytes, so they need different strong validators (RFC 9110
+    8.8.3), e.g. "abc" -> "abc-gzip".
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def decoded_etag(etag: str) -> str:
+    """The ETag of the uncompressed response, i.e. encoded_etag() undone."""
+    for encoding in ETAG_CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def exempt(endpoint: Callable) -> Callable:
+    """Decorator for routes whose responses must never be compressed."""
+    endpoint.compression_exempt = True
+    return endpoint
+
+
+def choose_encoding(accept_encoding: str, preferred: List[str]) -> Optional[str]:
+    """
+    The first of `preferred` (available) encodings the client accepts with a
+    non-zero q-value in its Accept-Encoding header, or None.
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in preferred:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the best encoding the client
+    accepts (in the order of `encodings`). Complete responses smaller than
+    `minimum_size` are left alone; streamed ones are compressed chunk by
+    chunk as they are sent, never buffered. Routes decorated with exempt()
+    and event streams are skipped.
+
+    Compressed responses get the encoding appended to their ETag (see
+    encoded_etag()), and so do 304s answering an If-None-Match that carries
+    it. The conditional helpers (api/v1/conditional.py) strip it again when
+    comparing. Responses vary on Accept-Encoding so caches keep one copy per
+    encoding.
+    """
+
+    def __init__(self, app, encodings: List[str], minimum_size: int = 1024) -> None:
+        self.app = app
+        self.encodings = [encoding for encoding in encodings if encoding in ENCODERS]
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        # HEAD responses carry the uncompressed length and no body to compress
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = choose_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if self._should_compress(scope, start, headers, body, more_body):
+                    compressor_class, level = ENCODERS[encoding]
+                    compressor = compressor_class(level)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    if "etag" in headers:
+                        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                    del headers["Content-Length"]
+                    if more_body:
+                        body = compressor.compress(body)
+                    else:
+                        body = compressor.compress(body) + compressor.finish()
+                        headers["Content-Length"] = str(len(body))
+                        compressor = None
+                elif self._compressible(scope, start, headers):
+                    headers.add_vary_header("Accept-Encoding")
+                elif start["status"] == 304 and "etag" in headers:
+                    # Repeat the validator the client holds: the compressed
+                    # version's if that is what it sent back
+                    etag = encoded_etag(headers["etag"], encoding)
+                    if etag in Headers(scope=scope).get("if-none-match", ""):
+                        headers["ETag"] = etag
+                    headers.add_vary_header("Accept-Encoding")
+                await send({**start, "headers": headers.raw})
+                await send({**message, "body": body})
+                return
+
+            if compressor is not None:
+                body = compressor.compress(body) if more_body else compressor.compress(body) + compressor.finish()
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None:
+            # The app started a response without a body
+            await send(start_message)
+
+    def _compressible(self, scope, start, headers: MutableHeaders) -> bool:
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        content_type = headers.get("content-type", "")
+        return (
+            not getattr(endpoint, "compression_exempt", False)
+            and start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(UNCOMPRESSED_TYPES)
+        )
+
+    def _should_compress(self, scope, start, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if not self._compressible(scope, start, headers):
+            return False
+        if more_body:
+            # Streamed: only skipped if it announced a small length up front
+            length = headers.get("content-length")
+            return length is None or int(length) >= self.minimum_size
+        return len(body) >= self.minimum_size
@@ -0,0 +1,30 @@
+from ..db.routing import primary_cookie
+
+# Methods that can't change anything, so don't pin the client to the primary
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware pinning clients to the primary database for a short while
+    after each successful write, so reads routed to a lagging replica can't
+    miss their own changes (see db/routing.py). Only installed when read
+    replicas are configured.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", primary_cookie().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from starlette.routing import BaseRoute, Match
+
+
+def match_route(router, scope) -> Optional[BaseRoute]:
+    """
+    The route of `router` that will handle the request in `scope`, for
+    middleware that needs it before routing has happened (FastAPI only sets
+    scope["route"] once the request reaches the router).
+    """
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route
+    return None
@@ -0,0 +1,65 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, text
+
+from backend.core import config as app_config
+from backend.db.base_class import Base
+from backend.models import task  # noqa: F401 - registers the tables on Base.metadata
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# Compared against the database by `alembic revision --autogenerate`
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    # An explicit sqlalchemy.url (e.g. set by the tests) wins over DATABASE_URL
+    url = config.get_main_option("sqlalchemy.url") or app_config.DATABASE_URL
+    if not url:
+        raise ValueError("DATABASE_URL is not set in the environment variables.")
+    return url
+
+
+def run_migrations_offline() -> None:
+    """Emit the SQL instead of running it (alembic upgrade head --sql)."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(database_url())
+    with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql" and app_config.MIGRATION_LOCK_TIMEOUT:
+            # Fail instead of queueing behind a long transaction: a waiting
+            # ALTER TABLE blocks every query on the table that comes after it
+            connection.execute(text("SELECT set_config('lock_timeout', :timeout, false)"),
+                               {"timeout": app_config.MIGRATION_LOCK_TIMEOUT})
+            connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # Commit after each migration, so locks taken by one are released
+            # before the next starts
+            transaction_per_migration=True,
+            # SQLite can't ALTER most things; autogenerate batch (copy-and-move) ops for it
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,43 @@
+"""Baseline: the tasks table as created by init_db before migrations
+
+Databases created with Base.metadata.create_all() before migrations were
+introduced are at this revision; init_db stamps them as such.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-06-02 09:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_STATUS = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", name="taskstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", TASK_STATUS, nullable=False),
+        sa.Column("due_date", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_title", "tasks", ["title"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_title", table_name="tasks")
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    TASK_STATUS.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,41 @@
+"""Add tasks.version and tasks.updated_at (ETags and conditional requests)
+
+Both are added without rewriting or long-locking the table: version has a
+constant default (a metadata-only change on PostgreSQL 11+), and updated_at
+is added as nullable, backfilled in batches, then made NOT NULL.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-06-02 09:05:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.db.migrations import batched_backfill, set_not_null
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")))
+
+    op.add_column("tasks", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # New rows get a value from now on; existing ones are backfilled below
+    with op.batch_alter_table("tasks") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), server_default=sa.func.now())
+    tasks = sa.table("tasks", sa.column("id", sa.Integer()), sa.column("updated_at", sa.DateTime()))
+    batched_backfill(tasks, {"updated_at": sa.func.now()}, tasks.c.updated_at.is_(None))
+    set_not_null("tasks", "updated_at", existing_type=sa.DateTime())
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("version")
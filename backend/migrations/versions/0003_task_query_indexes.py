@@ -0,0 +1,51 @@
+"""Indexes for filtered/sorted listing, title search and archiving
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so writes to tasks carry
+on while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-06-02 09:10:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.db.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently("ix_tasks_status_due_date_id", "tasks", ["status", "due_date", "id"])
+    create_index_concurrently("ix_tasks_due_date_id", "tasks", ["due_date", "id"])
+    create_index_concurrently(
+        "ix_tasks_completed_updated_at",
+        "tasks",
+        ["updated_at"],
+        postgresql_where=sa.text("status = 'COMPLETED'"),
+        sqlite_where=sa.text("status = 'COMPLETED'"),
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        create_index_concurrently(
+            "ix_tasks_title_trgm",
+            "tasks",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        drop_index_concurrently("ix_tasks_title_trgm", "tasks")
+    drop_index_concurrently("ix_tasks_completed_updated_at", "tasks")
+    drop_index_concurrently("ix_tasks_due_date_id", "tasks")
+    drop_index_concurrently("ix_tasks_status_due_date_id", "tasks")
@@ -0,0 +1,44 @@
+"""Add the tasks_archive table (jobs/archive.py)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-06-02 09:15:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The taskstatus type already exists on PostgreSQL (0001)
+TASK_STATUS = sa.Enum("PENDING", "IN_PROGRESS", "COMPLETED", name="taskstatus").with_variant(
+    postgresql.ENUM("PENDING", "IN_PROGRESS", "COMPLETED", name="taskstatus", create_type=False), "postgresql"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", TASK_STATUS, nullable=False),
+        sa.Column("due_date", sa.DateTime(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_archive_due_date_id", "tasks_archive", ["due_date", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_archive_due_date_id", table_name="tasks_archive")
+    op.drop_table("tasks_archive")
@@ -0,0 +1,32 @@
+"""Partial index on pending tasks for the claim queue
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-06-09 10:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from backend.db.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        "ix_tasks_pending_due_date_id",
+        "tasks",
+        ["due_date", "id"],
+        postgresql_where=sa.text("status = 'PENDING'"),
+        sqlite_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_tasks_pending_due_date_id", "tasks")
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SQLEnum
+from sqlalchemy import DDL, Column, Integer, String, Text, DateTime, Enum as SQLEnum, Index, event, func, text
 from sqlalchemy.orm import relationship
+from datetime import datetime
 import enum
 
 # Assuming Base is imported from db.base_class or similar
@@ -23,7 +24,75 @@ class Task(Base):
     # Using DateTime(timezone=True) is often recommended for handling timezones properly
     # but requires the database/driver to support it. Sticking to basic DateTime for now.
     due_date = Column(DateTime, nullable=False)
+    # Incremented by every update; backs the ETag and If-Match handling
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    # UTC time of the last change (sent as Last-Modified)
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now()
+    )
+
+    __table_args__ = (
+        # Serve status filters combined with due-date ranges/ordering (and the
+        # id tie-breaker used by keyset pagination) from a single index scan
+        Index("ix_tasks_status_due_date_id", "status", "due_date", "id"),
+        Index("ix_tasks_due_date_id", "due_date", "id"),
+        # Trigram index so prefix and substring title searches (ILIKE) don't
+        # need a sequential scan. PostgreSQL only; needs the pg_trgm extension.
+        Index(
+            "ix_tasks_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Lets the archiver find completed tasks by age without scanning the
+        # open ones
+        Index(
+            "ix_tasks_completed_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'COMPLETED'"),
+            sqlite_where=text("status = 'COMPLETED'"),
+        ),
+        # The claim queue (crud_task.claim_statement): pending tasks in due
+        # date order, without the claimed and completed ones
+        Index(
+            "ix_tasks_pending_due_date_id",
+            "due_date",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
 
     # Relationships can be added here later if needed, e.g.:
     # owner_id = Column(Integer, ForeignKey("users.id"))
-    # owner = relationship("User", back_populates="tasks") 
\ No newline at end of file
+    # owner = relationship("User", back_populates="tasks") 
+
+
+class ArchivedTask(Base):
+    """
+    Completed tasks moved out of `tasks` by the archiver (jobs/archive.py),
+    keeping their IDs. Only read when a request opts in with include_archived,
+    so the hot table and its indexes stay small.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    status = Column(SQLEnum(TaskStatus), nullable=False)
+    due_date = Column(DateTime, nullable=False)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_tasks_archive_due_date_id", "due_date", "id"),
+    )
+
+
+# Make sure pg_trgm is available before the trigram index is created
+event.listen(
+    Task.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
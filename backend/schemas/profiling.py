@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+# Current query profiling settings
+class QueryProfiling(BaseModel):
+    enabled: bool
+    slow_query_ms: float
+    max_queries: int
+
+# Properties to receive via API to change them; omitted thresholds are kept
+class QueryProfilingUpdate(BaseModel):
+    enabled: bool
+    slow_query_ms: Optional[float] = Field(None, ge=0)
+    max_queries: Optional[int] = Field(None, ge=1)
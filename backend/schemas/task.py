@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+import enum
 
 # Import the Enum from the models to reuse it
 from ..models.task import TaskStatus
@@ -24,10 +25,38 @@ class TaskCreate(TaskBase):
 class TaskUpdateStatus(BaseModel):
     status: TaskStatus
 
+# Orderings accepted by the task list ("-" prefix means descending)
+class TaskSort(str, enum.Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    DUE_DATE = "due_date"
+    DUE_DATE_DESC = "-due_date"
+    TITLE = "title"
+    TITLE_DESC = "-title"
+    STATUS = "status"
+    STATUS_DESC = "-status"
+
+# Formats the task export can be streamed in
+class TaskExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+# Criteria to narrow the task list down by
+class TaskFilter(BaseModel):
+    status: Optional[List[TaskStatus]] = None
+    due_from: Optional[datetime] = None
+    due_to: Optional[datetime] = None
+    overdue: bool = False
+    title_prefix: Optional[str] = Field(None, max_length=255)
+    search: Optional[str] = Field(None, max_length=255)
+    include_archived: bool = False
+
 # Properties shared by models stored in DB
 # (Currently same as TaskBase + id, but could differ later)
 class TaskInDBBase(TaskBase):
     id: int
+    version: int
+    updated_at: datetime
 
     model_config = {
         "from_attributes": True
@@ -41,4 +70,56 @@ class Task(TaskInDBBase):
 # Properties stored in DB
 # (Currently same as Task, but could differ if we add sensitive fields)
 class TaskInDB(TaskInDBBase):
-    pass 
\ No newline at end of file
+    pass 
+
+# Largest batch accepted by the bulk endpoints
+BULK_MAX_ITEMS = 5000
+
+# Properties to receive via API on bulk creation. Items are validated one by
+# one against TaskCreate so a bad row is reported rather than failing the batch.
+class TaskBulkCreate(BaseModel):
+    tasks: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=BULK_MAX_ITEMS, description="Items with the same fields as TaskCreate"
+    )
+
+# Properties to receive via API on bulk status update
+class TaskBulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+    status: TaskStatus
+
+# Properties to receive via API on bulk deletion
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+# Maximum tasks handed out by one claim request
+CLAIM_MAX_ITEMS = 100
+
+# Properties to receive via API when claiming tasks from the pending queue
+class TaskClaim(BaseModel):
+    limit: int = Field(1, ge=1, le=CLAIM_MAX_ITEMS, description="How many tasks to claim")
+
+# A single item that could not be processed in a bulk request
+class TaskBulkError(BaseModel):
+    index: Optional[int] = None  # Position in the request (bulk creation)
+    id: Optional[int] = None  # Task ID (bulk update/deletion)
+    detail: Any
+
+# Result of a bulk request: the tasks processed and the items that were not
+class TaskBulkResult(BaseModel):
+    tasks: List[Task]
+    errors: List[TaskBulkError] = []
+
+
+# Task counts by due date (tasks that aren't completed)
+class TaskDueBuckets(BaseModel):
+    today: int = 0
+    this_week: int = 0
+    later: int = 0
+
+# Properties to return via API for dashboard statistics
+class TaskStats(BaseModel):
+    total: int = 0
+    by_status: Dict[TaskStatus, int] = Field(default_factory=lambda: {status: 0 for status in TaskStatus})
+    overdue: int = 0
+    due: TaskDueBuckets = Field(default_factory=TaskDueBuckets)
+    generated_at: datetime
@@ -0,0 +1,86 @@
+"""
+Production server: several uvicorn worker processes behind one socket.
+
+    python -m backend.server                  # settings from core/config.py
+    python -m backend.server --workers 8
+
+Each worker is a freshly spawned interpreter that imports the app itself, so
+engines and their pools are created per process and never shared (see also
+db/session.py for processes that fork). Send SIGHUP to the main process to
+restart the workers one at a time, e.g. after a deploy; SIGTERM stops them,
+letting in-flight requests finish for up to SERVER_GRACEFUL_TIMEOUT seconds.
+"""
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+APP = "backend.main:app"
+
+
+def prepare_metrics_dir(workers: int) -> Optional[str]:
+    """
+    With several workers, point prometheus_client at a shared directory
+    (PROMETHEUS_MULTIPROC_DIR) so /metrics aggregates every worker. Values left
+    over from a previous run are removed. Returns the directory, if any.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if workers <= 1 and not directory:
+        return None
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        for stale in Path(directory).glob("*.db"):
+            stale.unlink()
+    else:
+        directory = tempfile.mkdtemp(prefix="taskapi-metrics-")
+    # Set before the workers start: they read it when importing prometheus_client
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def server_options(workers: int = config.WEB_CONCURRENCY) -> dict:
+    """Keyword arguments for uvicorn.run() from the SERVER_* settings."""
+    return {
+        "host": config.SERVER_HOST,
+        "port": config.SERVER_PORT,
+        "workers": workers,
+        # "auto" picks uvloop and httptools when they are installed
+        "loop": config.SERVER_LOOP,
+        "http": config.SERVER_HTTP,
+        "backlog": config.SERVER_BACKLOG,
+        "timeout_keep_alive": config.SERVER_KEEPALIVE,
+        "timeout_graceful_shutdown": config.SERVER_GRACEFUL_TIMEOUT,
+        "access_log": config.SERVER_ACCESS_LOG,
+        # Honour X-Forwarded-* from the load balancer in front of the workers
+        "proxy_headers": True,
+        "forwarded_allow_ips": config.FORWARDED_ALLOW_IPS,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the task API with several worker processes.")
+    parser.add_argument("--workers", type=int, default=config.WEB_CONCURRENCY,
+                        help=f"Worker processes (default: {config.WEB_CONCURRENCY})")
+    args = parser.parse_args(argv)
+
+    # Only needed to serve, not to read the settings above
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    prepare_metrics_dir(args.workers)
+    options = server_options(args.workers)
+    logger.info(
+        "Starting %d workers on %s:%d (loop=%s, http=%s)",
+        args.workers, options["host"], options["port"], options["loop"], options["http"],
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
 import os
-# Remove tempfile/shutil if only using Docker DB for tests
-# import tempfile
-# import shutil
+from pathlib import Path
+from typing import Optional
 
 # Load environment variables potentially set by Docker Compose
 from dotenv import load_dotenv
-from pathlib import Path
 
 # Define the path relative to this file to find the .env file
 env_path = Path(__file__).parent.parent / '.env'
@@ -16,57 +15,162 @@ load_dotenv(dotenv_path=env_path) # Load .env file
 
 # Adjust imports based on project structure
 from backend.db.base_class import Base
+from backend.db.session import make_async_url
 from backend.models.task import Task # Ensure model is imported
 
 # --- Database Configuration --- #
 
-# Use DATABASE_URL from environment if set (e.g., by docker-compose),
-# otherwise fall back to default (or raise error if needed)
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Use DATABASE_URL from environment if set (e.g., by docker-compose)
+BASE_DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    # Option 1: Raise error if not running in Docker context
+if not BASE_DATABASE_URL:
     raise EnvironmentError("DATABASE_URL environment variable not set. "
                            "Tests requiring the database should be run using Docker Compose.")
-    # Option 2: Fallback to SQLite (if tests support it)
-    # print("Warning: DATABASE_URL not set. Falling back to SQLite for tests.")
-    # _TEMP_DIR = tempfile.mkdtemp()
-    # TEST_DATABASE_FILE = os.path.join(_TEMP_DIR, "test_backend.db")
-    # DATABASE_URL = f"sqlite:///{TEST_DATABASE_FILE}"
+
+
+def worker_database_url(url: str, worker: Optional[str]) -> str:
+    """
+    Database for one pytest-xdist worker (`worker` is e.g. "gw0"), so workers
+    running in parallel don't share tables. Without xdist the URL is unchanged.
+    """
+    parsed = make_url(url)
+    if not worker or parsed.database in (None, "", ":memory:"):
+        return url
+    if parsed.get_backend_name() == "sqlite":
+        path = Path(parsed.database)
+        database = str(path.with_name(f"{path.stem}_{worker}{path.suffix}"))
+    else:
+        database = f"{parsed.database}_{worker}"
+    return parsed.set(database=database).render_as_string(hide_password=False)
+
+
+def create_database(url: str, admin_url: str) -> None:
+    """Create the PostgreSQL database for `url` if needed (SQLite creates files itself)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql" or url == admin_url:
+        return
+    admin_engine = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    try:
+        with admin_engine.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": parsed.database}
+            ).scalar()
+            if not exists:
+                conn.execute(text(f'CREATE DATABASE "{parsed.database}"'))
+    finally:
+        admin_engine.dispose()
+
+
+def enable_sqlite_savepoints(engine) -> None:
+    """
+    pysqlite/aiosqlite manage transactions themselves, which breaks SAVEPOINT;
+    let SQLAlchemy emit BEGIN instead (see the SQLAlchemy SQLite dialect docs).
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+DATABASE_URL = worker_database_url(BASE_DATABASE_URL, os.getenv("PYTEST_XDIST_WORKER"))
 
 # Create a test engine based on the resolved DATABASE_URL
 # Adjust connect_args based on DB type if needed (check_same_thread only for SQLite)
 connect_args = {}
-if DATABASE_URL and DATABASE_URL.startswith("sqlite"):
+if DATABASE_URL.startswith("sqlite"):
+    # The app serves sync routes from a threadpool on the test's connection
     connect_args={"check_same_thread": False}
 
 engine = create_engine(DATABASE_URL, connect_args=connect_args, pool_pre_ping=True)
+enable_sqlite_savepoints(engine)
+
+# Sessions join the test's outer transaction: commit() only releases a
+# SAVEPOINT, and everything is rolled back when the test ends
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, join_transaction_mode="create_savepoint")
 
-# Create a test session local bound EXPLICITLY to the test engine
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@pytest.fixture(scope="session")
+def schema():
+    """Create the tables once per test session (per worker with xdist)."""
+    create_database(DATABASE_URL, BASE_DATABASE_URL)
+    # Drop first so tables left over from an older model are rebuilt
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def db_connection(schema):
+    """Connection whose outer transaction is rolled back after each test."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
 
 @pytest.fixture(scope="function")
-def db() -> Session:
+def db(db_connection) -> Session:
     """Pytest fixture providing a transactional test database session."""
-    # Create tables before each test function
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
+    session = TestingSessionLocal(bind=db_connection)
     try:
         yield session
     finally:
         session.close()
-        # Drop tables after each test function to ensure isolation
-        Base.metadata.drop_all(bind=engine)
 
-# Optional: Cleanup the temp dir at the end of the session if needed,
-# but function-scoped fixtures might recreate it anyway.
-# def pytest_sessionfinish(session, exitstatus):
-#     if os.path.exists(_TEMP_DIR):
-#         print(f"Cleaning up temp dir: {_TEMP_DIR}")
-#         shutil.rmtree(_TEMP_DIR)
+@pytest.fixture(scope="function")
+def app_db(db_connection):
+    """
+    Serve the app's sessions from the test's transaction, so data created
+    through the API is visible to `db` and rolled back with it.
+    """
+    from backend.main import app
+    from backend.api.v1.endpoints.tasks import get_db, get_session_factory
+
+    factory = sessionmaker(bind=db_connection, autoflush=False, join_transaction_mode="create_savepoint")
 
-# You can add other fixtures here, e.g., for creating test data
+    def override_get_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
 
-# Import your CRUD functions and models here when ready
-# from app.crud import crud_task
-# from app.models import Task 
\ No newline at end of file
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    yield app
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_session_factory, None)
+
+@pytest.fixture
+def anyio_backend():
+    """Run async tests (marked with pytest.mark.anyio) on asyncio only."""
+    return "asyncio"
+
+@pytest.fixture(scope="function")
+async def async_db(schema):
+    """Async session on the same test database, rolled back like `db`."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_engine = create_async_engine(make_async_url(DATABASE_URL))
+    enable_sqlite_savepoints(async_engine)
+    connection = await async_engine.connect()
+    transaction = await connection.begin()
+    session = AsyncSession(
+        bind=connection, autoflush=False, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+        await async_engine.dispose()
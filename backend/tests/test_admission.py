@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import exc
+
+# Adjust imports based on project structure
+from backend.main import app as main_app
+from backend.api.v1.endpoints.tasks import get_db
+from backend.middleware import admission
+from backend.middleware.admission import AdmissionMiddleware, RouteGate
+
+@pytest.mark.anyio
+async def test_route_gate():
+    """Test the gate admits up to its limit, queues in order and hands slots over."""
+    gate = RouteGate(limit=1, queue_size=1)
+    assert gate.try_acquire()
+    assert not gate.try_acquire()
+    assert not await gate.wait(0.01)  # Timed out, and left the queue
+
+    waiting = asyncio.ensure_future(gate.wait(1))
+    await asyncio.sleep(0)
+    assert gate.queue_full()
+    gate.release()
+    assert await waiting
+    assert gate.active == 1
+    gate.release()
+    assert gate.active == 0
+
+def busy_app(monkeypatch, pressure: bool = False) -> tuple:
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.post("/write")
+    async def write():
+        return {}
+
+    @app.get("/health")
+    @admission.exempt
+    async def health():
+        return {}
+
+    monkeypatch.setattr(admission, "under_pressure", lambda engine: pressure)
+    app.add_middleware(
+        AdmissionMiddleware, router=app.router, get_engine=lambda: None,
+        concurrency=1, queue_size=0, queue_timeout=0.01, retry_after=3,
+    )
+    return app, release
+
+@pytest.mark.anyio
+async def test_admission_rejects_when_busy(monkeypatch):
+    """Test requests beyond a route's limit and queue get a 503 with Retry-After."""
+    app, release = busy_app(monkeypatch)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.ensure_future(client.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        response = await client.get("/slow")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        # Other routes have their own limits; exempt ones have none
+        assert (await client.post("/write")).status_code == 200
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert (await first).status_code == 200
+        assert (await client.get("/slow")).status_code == 200
+
+def test_admission_sheds_reads_under_pressure(monkeypatch):
+    """Test reads are rejected while the pool is under pressure and writes still go through."""
+    app, release = busy_app(monkeypatch, pressure=True)
+    with TestClient(app) as client:
+        assert client.get("/slow").status_code == 503
+        assert client.post("/write").status_code == 200
+        assert client.get("/health").status_code == 200
+
+def test_pool_timeout_returns_503():
+    """Test running out of pooled connections is reported as a retryable 503."""
+    def no_connection():
+        raise exc.TimeoutError("QueuePool limit reached")
+
+    main_app.dependency_overrides[get_db] = no_connection
+    try:
+        response = TestClient(main_app).post("/api/v1/tasks/claim", json={})
+    finally:
+        main_app.dependency_overrides.pop(get_db, None)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
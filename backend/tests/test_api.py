@@ -1,40 +1,35 @@
+import csv
+import io
+import json
 import pytest
+import time
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Adjust imports based on project structure
 from backend.main import app # Import the FastAPI app instance
-from backend.db.base_class import Base # Needed for table creation/deletion
-# Import TestingSessionLocal and test_engine from conftest
-from .conftest import TestingSessionLocal, engine as test_engine
-from backend.api.v1.endpoints.tasks import get_db # Import the original dependency
-from backend.schemas.task import TaskStatus # Import enum if needed
-
-# We don't need the db fixture imported directly if client fixture uses it
-# from .conftest import db as db_fixture
-
-# Override the get_db dependency for testing
-def override_get_db():
-    """Dependency override to use the test database session AND ensure tables exist."""
-    # Ensure tables are created for this specific override instance
-    Base.metadata.create_all(bind=test_engine)
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        # Optional: Drop tables here too, though conftest fixture might still do it
-        # Base.metadata.drop_all(bind=test_engine) # Maybe redundant if conftest works
-
-# Apply the dependency override to the app before creating the client
-app.dependency_overrides[get_db] = override_get_db
+from backend.schemas.task import Task as TaskSchema, TaskStatus # Import enum if needed
+from backend.api.v1 import conditional, feed, serialization
+from backend.core import changes, config
+from backend.db import routing, session as db_session
+from backend.middleware import compression
+from backend.middleware.compression import CompressionMiddleware
+from backend.middleware.read_your_writes import ReadYourWritesMiddleware
+from backend.crud import crud_task
+from backend.models.task import Task
+from fastapi.encoders import jsonable_encoder
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import sessionmaker
+from prometheus_client import REGISTRY
+from pydantic import TypeAdapter
+from typing import List
 
 @pytest.fixture(scope="function")
-def client(db: Session): # <--- Make client depend on db again
-    """Pytest fixture to provide a TestClient instance. Depends on db fixture for setup."""
-    # db fixture (from conftest) handles setup/teardown
-    yield TestClient(app)
+def client(app_db):
+    """Pytest fixture to provide a TestClient instance on the test's transaction (see conftest.py)."""
+    yield TestClient(app_db)
 
 def test_read_root(client: TestClient):
     """Test the root endpoint."""
@@ -140,8 +135,333 @@ def test_delete_task_api(client: TestClient):
     get_response = client.get(f"/api/v1/tasks/{created_id}")
     assert get_response.status_code == 404
 
+def test_read_tasks_cursor_api(client: TestClient):
+    """Test following the X-Next-Cursor header through the task list."""
+    for i in range(3):
+        client.post("/api/v1/tasks/", json={"title": f"API Cursor {i}", "due_date": datetime.utcnow().isoformat()})
+
+    response = client.get("/api/v1/tasks/", params={"limit": 2})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["API Cursor 0", "API Cursor 1"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/api/v1/tasks/", params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["API Cursor 2"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_read_tasks_bad_cursor_api(client: TestClient):
+    """Test that invalid cursor usage is a client error."""
+    assert client.get("/api/v1/tasks/", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/api/v1/tasks/", params={"cursor": "garbage", "skip": 5}).status_code == 400
+
+def test_read_tasks_filtered_api(client: TestClient):
+    """Test filtering and sorting the task list via query parameters."""
+    client.post("/api/v1/tasks/", json={"title": "Alpha filter", "due_date": "2030-01-02T09:00:00"})
+    client.post("/api/v1/tasks/", json={"title": "Beta filter", "due_date": "2030-01-01T09:00:00", "status": "IN_PROGRESS"})
+    client.post("/api/v1/tasks/", json={"title": "Gamma", "due_date": "2030-01-03T09:00:00"})
+
+    response = client.get("/api/v1/tasks/", params={"search": "filter", "sort": "due_date"})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["Beta filter", "Alpha filter"]
+
+    response = client.get("/api/v1/tasks/", params={"status": "PENDING", "sort": "-title"})
+    assert [t["title"] for t in response.json()] == ["Gamma", "Alpha filter"]
+
+    assert client.get("/api/v1/tasks/", params={"sort": "colour"}).status_code == 422
+
+def test_read_task_stats_api(client: TestClient):
+    """Test the stats route (and that it isn't taken for a task ID)."""
+    client.post("/api/v1/tasks/", json={"title": "Late", "due_date": "2000-01-01T09:00:00"})
+    client.post("/api/v1/tasks/", json={"title": "Done", "due_date": "2000-01-01T09:00:00", "status": "COMPLETED"})
+
+    response = client.get("/api/v1/tasks/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert data["by_status"] == {"PENDING": 1, "IN_PROGRESS": 0, "COMPLETED": 1}
+    assert data["overdue"] == 1
+    assert data["due"] == {"today": 0, "this_week": 0, "later": 0}
+
+@pytest.mark.anyio
+async def test_change_feed_stream():
+    """Test change events are framed as server-sent events."""
+    subscribers = len(changes.hub._subscribers)
+    stream = feed.event_stream()
+    assert (await stream.__anext__()).startswith(b"retry:")
+    assert len(changes.hub._subscribers) == subscribers + 1
+
+    changes.hub.publish([{"type": "deleted", "task": {"id": 7}}])
+    assert await stream.__anext__() == b'event: deleted\ndata: {"type":"deleted","task":{"id":7}}\n\n'
+
+    await stream.aclose()
+    assert len(changes.hub._subscribers) == subscribers  # Unsubscribed
+
+    # A client gone before the body started never subscribes
+    await feed.event_stream().aclose()
+    assert len(changes.hub._subscribers) == subscribers
+
+def test_read_archived_tasks_api(client: TestClient, db: Session):
+    """Test archived tasks are only returned with include_archived."""
+    task_id = client.post(
+        "/api/v1/tasks/", json={"title": "Archive me", "due_date": "2020-01-01T09:00:00", "status": "COMPLETED"}
+    ).json()["id"]
+    crud_task.archive_tasks(db=db, cutoff=datetime.utcnow() + timedelta(days=1))
+
+    assert client.get("/api/v1/tasks/").json() == []
+    assert client.get(f"/api/v1/tasks/{task_id}").status_code == 404
+    response = client.get("/api/v1/tasks/", params={"include_archived": True})
+    assert [t["id"] for t in response.json()] == [task_id]
+    response = client.get(f"/api/v1/tasks/{task_id}", params={"include_archived": True})
+    assert response.status_code == 200 and response.json()["title"] == "Archive me"
+
+def test_metrics_endpoint(client: TestClient):
+    """Test the Prometheus endpoint exposes the pool metrics."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "taskapi_db_pool_checkout_seconds" in response.text
+
+def test_bulk_api(client: TestClient):
+    """Test the bulk endpoints report per-item errors without failing the batch."""
+    due_date = datetime.utcnow().isoformat()
+    response = client.post("/api/v1/tasks/bulk", json={"tasks": [
+        {"title": "Bulk API 1", "due_date": due_date},
+        {"due_date": due_date},  # Missing title
+        {"title": "Bulk API 2", "due_date": due_date, "status": "IN_PROGRESS"},
+    ]})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [t["title"] for t in data["tasks"]] == ["Bulk API 1", "Bulk API 2"]
+    assert [e["index"] for e in data["errors"]] == [1]
+    assert data["errors"][0]["detail"][0]["loc"] == ["title"]
+    ids = [t["id"] for t in data["tasks"]]
+
+    response = client.patch("/api/v1/tasks/status/bulk", json={"ids": ids + [99999], "status": "COMPLETED"})
+    assert response.status_code == 200
+    data = response.json()
+    assert {t["status"] for t in data["tasks"]} == {"COMPLETED"}
+    assert data["errors"] == [{"index": None, "id": 99999, "detail": "Task not found"}]
+
+    response = client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": ids})
+    assert response.status_code == 200
+    assert sorted(t["id"] for t in response.json()["tasks"]) == sorted(ids)
+    assert client.get(f"/api/v1/tasks/{ids[0]}").status_code == 404
+
+def test_claim_tasks_api(client: TestClient):
+    """Test the claim endpoint hands out pending tasks and validates the limit."""
+    due_date = datetime.utcnow().isoformat()
+    client.post("/api/v1/tasks/bulk", json={"tasks": [{"title": "Claim me", "due_date": due_date}]})
+
+    response = client.post("/api/v1/tasks/claim", json={"limit": 5})
+    assert response.status_code == 200, response.text
+    assert [(t["title"], t["status"]) for t in response.json()] == [("Claim me", "IN_PROGRESS")]
+    assert client.post("/api/v1/tasks/claim", json={}).json() == []
+    assert client.post("/api/v1/tasks/claim", json={"limit": 0}).status_code == 422
+
+def test_conditional_get_api(client: TestClient):
+    """Test ETag/If-None-Match on task reads."""
+    task = client.post("/api/v1/tasks/", json={"title": "ETag Task", "due_date": datetime.utcnow().isoformat()}).json()
+    assert task["version"] == 1
+
+    response = client.get(f"/api/v1/tasks/{task['id']}")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"].endswith("GMT")
+    response = client.get(f"/api/v1/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    list_etag = client.get("/api/v1/tasks/").headers["ETag"]
+    assert client.get("/api/v1/tasks/", headers={"If-None-Match": list_etag}).status_code == 304
+
+    # Any change to the task gives both representations a new ETag
+    client.patch(f"/api/v1/tasks/{task['id']}/status", json={"status": "IN_PROGRESS"})
+    response = client.get(f"/api/v1/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert client.get("/api/v1/tasks/", headers={"If-None-Match": list_etag}).status_code == 200
+
+def test_update_task_status_if_match_api(client: TestClient):
+    """Test If-Match makes status updates fail instead of overwriting a newer change."""
+    task = client.post("/api/v1/tasks/", json={"title": "If-Match Task", "due_date": datetime.utcnow().isoformat()}).json()
+    etag = client.get(f"/api/v1/tasks/{task['id']}").headers["ETag"]
+
+    response = client.patch(f"/api/v1/tasks/{task['id']}/status", json={"status": "IN_PROGRESS"}, headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+
+    # A second caseworker still holding the old ETag loses the race
+    response = client.patch(f"/api/v1/tasks/{task['id']}/status", json={"status": "COMPLETED"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/api/v1/tasks/{task['id']}").json()["status"] == "IN_PROGRESS"
+
+    response = client.patch("/api/v1/tasks/99999/status", json={"status": "COMPLETED"}, headers={"If-Match": '"task-99999-v1"'})
+    assert response.status_code == 404
+
+def test_export_tasks_api(client: TestClient):
+    """Test streaming the task table as NDJSON and CSV."""
+    client.post("/api/v1/tasks/", json={"title": "Export 1", "due_date": "2030-01-01T09:00:00"})
+    client.post("/api/v1/tasks/", json={"title": "Export, 2", "description": "Quoted", "due_date": "2030-01-02T09:00:00", "status": "COMPLETED"})
+
+    response = client.get("/api/v1/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in rows] == ["Export 1", "Export, 2"]
+    assert rows[0]["due_date"] == "2030-01-01T09:00:00"
+    assert rows[1]["status"] == "COMPLETED"
+
+    response = client.get("/api/v1/tasks/export", params={"format": "csv", "status": "COMPLETED"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["title"], r["description"]) for r in rows] == [("Export, 2", "Quoted")]
+
+def test_read_tasks_fast_serialization_matches_schema(db: Session):
+    """Test the direct row serialization renders exactly like the Task response model."""
+    db.add_all([
+        Task(title="Fast path ✓", description=None, due_date=datetime(2030, 1, 1, 9, 0, 0, 123456)),
+        Task(title="Fast path 2", description="Desc", due_date=datetime(2030, 1, 2), status=TaskStatus.COMPLETED),
+    ])
+    db.commit()
+    rows = crud_task.get_task_rows(db=db)
+
+    fast = serialization.task_rows_response(rows).body
+    validated = TypeAdapter(List[TaskSchema]).validate_python(crud_task.get_tasks(db=db), from_attributes=True)
+    slow = JSONResponse(jsonable_encoder(validated)).body
+    assert fast == slow
+
+def test_request_metrics(client: TestClient):
+    """Test requests are counted per route template rather than raw path."""
+    labels = {"method": "GET", "route": "/api/v1/tasks/{task_id}", "status": "404"}
+    before = REGISTRY.get_sample_value("taskapi_http_requests_total", labels) or 0
+
+    client.get("/api/v1/tasks/99998")
+    client.get("/api/v1/tasks/99999")
+
+    assert REGISTRY.get_sample_value("taskapi_http_requests_total", labels) == before + 2
+    assert "taskapi_http_request_duration_seconds_bucket" in client.get("/metrics").text
+
+
+def test_reads_routed_to_replica(client: TestClient, db_connection, monkeypatch):
+    """Test read routes use a replica unless the client is pinned to the primary."""
+    replica_sessions = []
+    replica_factory = sessionmaker(bind=db_connection, join_transaction_mode="create_savepoint")
+
+    def replica():
+        replica_sessions.append(replica_factory())
+        return replica_sessions[-1]
+
+    monkeypatch.setattr(config, "DATABASE_REPLICA_URLS", ["sqlite://"])
+    monkeypatch.setattr(db_session.get_databases(), "ReplicaSessions", [replica])
+    task_id = client.post("/api/v1/tasks/", json={"title": "Replica", "due_date": datetime.utcnow().isoformat()}).json()["id"]
+
+    for path in ("/api/v1/tasks/", f"/api/v1/tasks/{task_id}", "/api/v1/tasks/stats", "/api/v1/tasks/export"):
+        assert client.get(path).status_code == 200, path
+    assert len(replica_sessions) == 4
+
+    # Pinned after a write: reads go to the primary and skip the cache
+    client.cookies.set(routing.PRIMARY_COOKIE, str(time.time() + 60))
+    assert client.get(f"/api/v1/tasks/{task_id}").status_code == 200
+    assert len(replica_sessions) == 4
+
+def test_read_your_writes_middleware():
+    """Test successful writes pin the client to the primary and reads don't."""
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.get("/item")(lambda: {})
+    app.post("/item")(lambda: {})
+
+    @app.delete("/item")
+    def fail():
+        return JSONResponse({}, status_code=404)
+
+    with TestClient(app) as client:
+        assert routing.PRIMARY_COOKIE not in client.get("/item").cookies
+        assert routing.PRIMARY_COOKIE not in client.delete("/item").cookies
+        response = client.post("/item")
+        assert routing.PRIMARY_COOKIE in response.cookies
+        assert routing.pinned_to_primary(response.cookies)
+
+def test_pinned_to_primary_expires():
+    """Test the pin expires after READ_YOUR_WRITES_SECONDS, even if the cookie is kept."""
+    assert routing.pinned_to_primary({routing.PRIMARY_COOKIE: str(time.time() + 60)})
+    assert not routing.pinned_to_primary({routing.PRIMARY_COOKIE: str(time.time() - 1)})
+    assert not routing.pinned_to_primary({routing.PRIMARY_COOKIE: "garbage"})
+    assert not routing.pinned_to_primary({})
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation honours q-values and server preference."""
+    assert compression.choose_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert compression.choose_encoding("gzip;q=1.0, br;q=0", ["br", "gzip"]) == "gzip"
+    assert compression.choose_encoding("*", ["gzip"]) == "gzip"
+    assert compression.choose_encoding("identity", ["br", "gzip"]) is None
+
+def test_encoded_etags():
+    """Test the content coding suffix is added to ETags and ignored when comparing them."""
+    assert compression.encoded_etag('"task-5-v2"', "br") == '"task-5-v2-br"'
+    assert compression.decoded_etag('"task-5-v2-br"') == '"task-5-v2"'
+    assert conditional.none_match('W/"task-5-v2-gzip"', '"task-5-v2"')
+    assert conditional.expected_version('"task-5-v2-zstd"', 5) == 2
+
+def test_compressed_responses(client: TestClient):
+    """Test large responses are compressed, small ones and exempt routes aren't."""
+    due_date = datetime.utcnow().isoformat()
+    client.post("/api/v1/tasks/bulk", json={"tasks": [{"title": f"Compress {i}", "due_date": due_date} for i in range(50)]})
+
+    response = client.get("/api/v1/tasks/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.json()) == 50  # httpx decodes it
+
+    # Each coding gets its own strong ETag, and either one revalidates
+    etag = response.headers["ETag"]
+    identity_etag = client.get("/api/v1/tasks/", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+    assert etag == compression.encoded_etag(identity_etag, "gzip") != identity_etag
+    response = client.get("/api/v1/tasks/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    response = client.get("/api/v1/tasks/", headers={"Accept-Encoding": "gzip", "If-None-Match": identity_etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == identity_etag
+
+    response = client.get("/api/v1/tasks/", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    response = client.get("/api/v1/tasks/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 50
+
+def test_compression_streams_and_exemptions():
+    """Test streamed responses are compressed chunk by chunk and exempt routes are left alone."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, encodings=["br", "gzip"], minimum_size=10)
+    chunks = [b"x" * 1000, b"y" * 1000]
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(chunks), media_type="application/x-ndjson")
+
+    @app.get("/exempt")
+    @compression.exempt
+    def exempt():
+        return JSONResponse({"data": "z" * 1000})
+
+    with TestClient(app) as client:
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.content == b"".join(chunks)
+        assert "Content-Encoding" not in client.get("/exempt", headers={"Accept-Encoding": "gzip"}).headers
+        if "br" in compression.ENCODERS:
+            response = client.get("/stream", headers={"Accept-Encoding": "gzip, br"})
+            assert response.headers["Content-Encoding"] == "br"
+            assert response.content == b"".join(chunks)
+
+
 # --- Add more tests below for other endpoints --- #
 # def test_read_tasks_api(client: TestClient):
 # def test_read_single_task_api(client: TestClient):
 # def test_update_task_status_api(client: TestClient):
-# def test_delete_task_api(client: TestClient): 
\ No newline at end of file
+# def test_delete_task_api(client: TestClient):
@@ -0,0 +1,69 @@
+import pytest
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+
+# Adjust imports based on project structure
+from backend.api.v1 import api
+from backend.api.v1.endpoints import tasks, tasks_async
+from backend.crud import crud_task_async
+from backend.models.task import TaskStatus
+from backend.schemas.task import TaskCreate, TaskFilter, TaskUpdateStatus
+
+pytestmark = pytest.mark.anyio
+
+async def test_async_crud_round_trip(async_db: AsyncSession):
+    """Test the async CRUD functions end to end."""
+    due_date = datetime.utcnow() + timedelta(days=1)
+    created = await crud_task_async.create_task(db=async_db, task=TaskCreate(title="Async Task", due_date=due_date))
+    assert created.id is not None
+    assert created.status == TaskStatus.PENDING
+
+    fetched = await crud_task_async.get_task(db=async_db, task_id=created.id)
+    assert fetched is not None and fetched.title == "Async Task"
+
+    listed = await crud_task_async.get_tasks(db=async_db, filters=TaskFilter(search="async"))
+    assert [t.id for t in listed] == [created.id]
+
+    updated = await crud_task_async.update_task_status(
+        db=async_db, task_id=created.id, task_update=TaskUpdateStatus(status=TaskStatus.COMPLETED)
+    )
+    assert updated.status == TaskStatus.COMPLETED
+
+    deleted = await crud_task_async.delete_task(db=async_db, task_id=created.id)
+    assert deleted.id == created.id
+    assert await crud_task_async.get_task(db=async_db, task_id=created.id) is None
+
+async def test_async_routes_api(async_db: AsyncSession):
+    """Test the async router serves the same API as the sync one."""
+    app = FastAPI()
+    app.include_router(tasks_async.router, prefix="/api/v1/tasks")
+
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[tasks_async.get_async_db] = override_get_async_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/v1/tasks/", json={"title": "Async API", "due_date": datetime.utcnow().isoformat()})
+        assert response.status_code == 201, response.text
+        task_id = response.json()["id"]
+
+        response = await client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": "IN_PROGRESS"})
+        assert response.json()["status"] == "IN_PROGRESS"
+
+        response = await client.get("/api/v1/tasks/", params={"status": "IN_PROGRESS"})
+        assert [t["id"] for t in response.json()] == [task_id]
+
+        assert (await client.delete(f"/api/v1/tasks/{task_id}")).status_code == 200
+        assert (await client.get(f"/api/v1/tasks/{task_id}")).status_code == 404
+
+def test_prefer_async_routes_keeps_order():
+    """Test async routes replace their sync counterparts in place."""
+    merged = api.prefer_async_routes(tasks.router, tasks_async.router)
+    assert [(r.path, r.methods) for r in merged.routes] == [(r.path, r.methods) for r in tasks.router.routes]
+    async_keys = {(r.path, frozenset(r.methods)) for r in tasks_async.router.routes}
+    for route in merged.routes:
+        expected = tasks_async if (route.path, frozenset(route.methods)) in async_keys else tasks
+        assert route.endpoint.__module__ == expected.__name__
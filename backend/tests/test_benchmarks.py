@@ -0,0 +1,37 @@
+import pytest
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Adjust imports based on project structure
+from backend.benchmarks import compare, run
+from backend.models.task import Task
+
+def test_percentile():
+    """Test percentiles use the nearest-rank method."""
+    samples = [float(i) for i in range(1, 101)]
+    assert run.percentile(samples, 50) == 50
+    assert run.percentile(samples, 99) == 99
+    assert run.percentile([3.0], 95) == 3
+    assert run.percentile([], 95) == 0
+
+def test_compare_regressions():
+    """Test only changes for the worse beyond the threshold are reported."""
+    before = {"read": {"throughput_rps": 100, "p95_ms": 10, "p99_ms": 20}}
+    after = {"read": {"throughput_rps": 80, "p95_ms": 10.5, "p99_ms": 10}}
+    assert compare.regressions(before, after, threshold=10) == ["read throughput_rps: 100 -> 80 (-20.0%)"]
+
+@pytest.mark.anyio
+async def test_benchmark_smoke(db: Session, app_db):
+    """Test every scenario runs without errors against the app."""
+    transport = httpx.ASGITransport(app=app_db)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Sequential: every session in the test shares one connection
+        results = await run.run_benchmark(client, tasks=150, requests=20, concurrency=1, warmup=2)
+
+    assert set(results) == set(run.SCENARIOS)
+    for name, result in results.items():
+        assert result["errors"] == 0, name
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+    # Everything the create scenarios added was deleted again
+    assert db.execute(select(func.count()).select_from(Task)).scalar_one() == 150
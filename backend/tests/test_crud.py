@@ -1,11 +1,22 @@
+import json
 import pytest
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from typing import List
 
 # Adjust imports based on your project structure
+from prometheus_client import REGISTRY
+
+from backend.core import changes
+from backend.core.cache import LRUCache
 from backend.crud import crud_task
-from backend.models.task import Task, TaskStatus
-from backend.schemas.task import TaskCreate, TaskUpdateStatus
+from backend.crud.pagination import InvalidCursorError
+from backend.models.task import ArchivedTask, Task, TaskStatus
+from backend.jobs import archive
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import asyncpg as postgresql_asyncpg
+from sqlalchemy.orm import sessionmaker
+from backend.schemas.task import TaskCreate, TaskFilter, TaskUpdateStatus
 
 # Use the db fixture from conftest.py
 
@@ -74,9 +85,8 @@ def test_update_task_status(db: Session):
     assert updated_task.id == created_task.id
     assert updated_task.status == TaskStatus.IN_PROGRESS
 
-    # Verify in DB
-    db.refresh(updated_task) # Ensure we have the latest from DB session
-    assert updated_task.status == TaskStatus.IN_PROGRESS
+    # Verify in DB (the update returns a plain row, so read the task back)
+    assert crud_task.get_task(db=db, task_id=created_task.id).status == TaskStatus.IN_PROGRESS
 
 def test_delete_task(db: Session):
     """Test deleting a task."""
@@ -95,10 +105,290 @@ def test_delete_task(db: Session):
     task_after_delete = crud_task.get_task(db=db, task_id=task_id)
     assert task_after_delete is None
 
+def test_get_tasks_cursor_pagination(db: Session):
+    """Test walking the task list with keyset cursors."""
+    for i in range(5):
+        crud_task.create_task(db=db, task=TaskCreate(title=f"Paged Task {i}", due_date=datetime.utcnow()))
+
+    first_page = crud_task.get_tasks(db=db, limit=2)
+    cursor = crud_task.next_cursor(first_page, limit=2)
+    assert cursor is not None
+
+    second_page = crud_task.get_tasks(db=db, limit=2, cursor=cursor)
+    third_page = crud_task.get_tasks(db=db, limit=2, cursor=crud_task.next_cursor(second_page, limit=2))
+
+    titles = [t.title for t in first_page + second_page + third_page]
+    assert titles == [f"Paged Task {i}" for i in range(5)]
+    # A short page means there is nothing left to fetch
+    assert crud_task.next_cursor(third_page, limit=2) is None
+
+def test_get_tasks_invalid_cursor(db: Session):
+    """Test that a garbled cursor is rejected."""
+    with pytest.raises(InvalidCursorError):
+        crud_task.get_tasks(db=db, cursor="not-a-cursor")
+
+def test_get_tasks_filters(db: Session):
+    """Test narrowing the task list by status, due date and title."""
+    now = datetime.utcnow()
+    crud_task.create_task(db=db, task=TaskCreate(title="Overdue hearing", due_date=now - timedelta(days=1)))
+    crud_task.create_task(
+        db=db,
+        task=TaskCreate(title="Done hearing", due_date=now - timedelta(days=1), status=TaskStatus.COMPLETED),
+    )
+    crud_task.create_task(
+        db=db,
+        task=TaskCreate(title="Review bundle", due_date=now + timedelta(days=3), status=TaskStatus.IN_PROGRESS),
+    )
+
+    def titles(**criteria):
+        return [t.title for t in crud_task.get_tasks(db=db, filters=TaskFilter(**criteria))]
+
+    assert titles(status=[TaskStatus.IN_PROGRESS]) == ["Review bundle"]
+    assert titles(status=[TaskStatus.PENDING, TaskStatus.COMPLETED]) == ["Overdue hearing", "Done hearing"]
+    assert titles(overdue=True) == ["Overdue hearing"]
+    assert titles(due_from=now) == ["Review bundle"]
+    assert titles(due_to=now) == ["Overdue hearing", "Done hearing"]
+    assert titles(title_prefix="review") == ["Review bundle"]
+    assert titles(search="HEARING") == ["Overdue hearing", "Done hearing"]
+    # LIKE wildcards in the search text are matched literally
+    assert titles(search="%") == []
+
+def test_get_tasks_sorted_cursor_pagination(db: Session):
+    """Test keyset pagination over a descending due-date ordering with ties."""
+    base = datetime.utcnow()
+    due_dates = [base, base + timedelta(days=2), base + timedelta(days=1), base + timedelta(days=1)]
+    for i, due_date in enumerate(due_dates):
+        crud_task.create_task(db=db, task=TaskCreate(title=f"Sorted {i}", due_date=due_date))
+
+    seen = []
+    cursor = None
+    while True:
+        page = crud_task.get_tasks(db=db, limit=3, cursor=cursor, sort="-due_date")
+        seen.extend(t.title for t in page)
+        cursor = crud_task.next_cursor(page, limit=3, sort="-due_date")
+        if cursor is None:
+            break
+
+    assert seen == ["Sorted 1", "Sorted 3", "Sorted 2", "Sorted 0"]
+    # A cursor only makes sense for the ordering it was issued for
+    with pytest.raises(InvalidCursorError):
+        crud_task.get_tasks(db=db, cursor=crud_task.next_cursor(page[:1], limit=1, sort="-due_date"))
+
+def test_get_tasks_status_cursor_pagination(db: Session):
+    """Test keyset pagination by status, and that the cursor's status is bound as the enum on PostgreSQL."""
+    for status in (TaskStatus.PENDING, TaskStatus.COMPLETED, TaskStatus.IN_PROGRESS, TaskStatus.PENDING):
+        task_in = TaskCreate(title=f"By status {status.value}", due_date=datetime.utcnow(), status=status)
+        crud_task.create_task(db=db, task=task_in)
+
+    seen, cursor = [], None
+    while True:
+        page = crud_task.get_tasks(db=db, limit=2, cursor=cursor, sort="-status")
+        seen.extend(t.status for t in page)
+        cursor = crud_task.next_cursor(page, limit=2, sort="-status")
+        if cursor is None:
+            break
+    assert seen == sorted(seen, key=lambda status: status.name, reverse=True) and len(seen) == 4
+
+    first = crud_task.get_tasks(db=db, limit=1, sort="status")
+    statement = crud_task.tasks_statement(limit=1, sort="status", cursor=crud_task.next_cursor(first, 1, sort="status"))
+    sql = str(statement.compile(dialect=postgresql_asyncpg.dialect()))
+    assert "::taskstatus" in sql.lower()
+    assert "VARCHAR" not in sql
+
+def test_update_and_delete_missing_task(db: Session):
+    """Test the single-statement update/delete return None for unknown IDs."""
+    status_update = TaskUpdateStatus(status=TaskStatus.COMPLETED)
+    assert crud_task.update_task_status(db=db, task_id=99999, task_update=status_update) is None
+    assert crud_task.delete_task(db=db, task_id=99999) is None
+
+def test_get_task_stats(db: Session):
+    """Test counts by status and due-date bucket, relative to a fixed time."""
+    now = datetime(2030, 1, 2, 12, 0)  # A Wednesday
+    for due_date, status in [
+        (datetime(2030, 1, 1, 9, 0), TaskStatus.PENDING),       # overdue
+        (datetime(2030, 1, 1, 9, 0), TaskStatus.COMPLETED),     # done, not overdue
+        (datetime(2030, 1, 2, 15, 0), TaskStatus.IN_PROGRESS),  # today
+        (datetime(2030, 1, 6, 23, 0), TaskStatus.PENDING),      # this week (Sunday)
+        (datetime(2030, 1, 7, 0, 0), TaskStatus.PENDING),       # next Monday: later
+    ]:
+        crud_task.create_task(db=db, task=TaskCreate(title="Stats", due_date=due_date, status=status))
+
+    stats = crud_task.get_task_stats(db=db, now=now)
+
+    assert stats.total == 5
+    assert stats.by_status == {TaskStatus.PENDING: 3, TaskStatus.IN_PROGRESS: 1, TaskStatus.COMPLETED: 1}
+    assert stats.overdue == 1
+    assert (stats.due.today, stats.due.this_week, stats.due.later) == (1, 1, 1)
+
+def test_bulk_task_operations(db: Session):
+    """Test creating, updating and deleting tasks in bulk."""
+    due_date = datetime.utcnow()
+    created = crud_task.create_tasks(
+        db=db, tasks=[TaskCreate(title=f"Bulk {i}", due_date=due_date) for i in range(3)]
+    )
+    assert [t.title for t in created] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    ids = [t.id for t in created]
+
+    updated = crud_task.update_tasks_status(db=db, task_ids=ids[:2] + [99999], status=TaskStatus.COMPLETED)
+    assert sorted(t.id for t in updated) == ids[:2]
+    assert all(t.status == TaskStatus.COMPLETED for t in updated)
+    assert crud_task.get_task(db=db, task_id=ids[2]).status == TaskStatus.PENDING
+
+    deleted = crud_task.delete_tasks(db=db, task_ids=ids)
+    assert sorted(t.id for t in deleted) == ids
+    assert crud_task.get_tasks(db=db) == []
+
+def test_claim_tasks(db: Session):
+    """Test claims take pending tasks due soonest first, each only once."""
+    now = datetime.utcnow()
+    created = crud_task.create_tasks(db=db, tasks=[
+        TaskCreate(title="Later", due_date=now + timedelta(days=2)),
+        TaskCreate(title="Done", due_date=now - timedelta(days=2), status=TaskStatus.COMPLETED),
+        TaskCreate(title="Soonest", due_date=now),
+        TaskCreate(title="Next", due_date=now + timedelta(days=1)),
+    ])
+
+    first = crud_task.claim_tasks(db=db, limit=2)
+    assert [t.title for t in first] == ["Soonest", "Next"]
+    assert all(t.status == TaskStatus.IN_PROGRESS and t.version == 2 for t in first)
+
+    assert [t.title for t in crud_task.claim_tasks(db=db, limit=2)] == ["Later"]
+    assert crud_task.claim_tasks(db=db, limit=2) == []
+    assert crud_task.get_task(db=db, task_id=created[1].id).status == TaskStatus.COMPLETED
+
+@pytest.fixture
+def task_cache(monkeypatch):
+    """Enable the read-through task cache with an empty backend."""
+    monkeypatch.setattr(crud_task.task_cache, "enabled", True)
+    monkeypatch.setattr(crud_task.task_cache, "backend", LRUCache(max_entries=16))
+    return crud_task.task_cache
+
+def cache_count(result):
+    return REGISTRY.get_sample_value("taskapi_cache_requests_total", {"cache": "tasks", "result": result}) or 0
+
+def test_cached_reads_invalidated_by_writes(db: Session, task_cache):
+    """Test cached reads are served from the cache until a write happens."""
+    task_id = crud_task.create_task(db=db, task=TaskCreate(title="Cached", due_date=datetime.utcnow())).id
+    hits, misses = cache_count("hit"), cache_count("miss")
+
+    assert crud_task.get_task_cached(db=db, task_id=task_id).title == "Cached"
+    assert [t.title for t in crud_task.get_tasks_cached(db=db)] == ["Cached"]
+    assert crud_task.get_task_cached(db=db, task_id=task_id).status == TaskStatus.PENDING
+    assert [t.title for t in crud_task.get_tasks_cached(db=db)] == ["Cached"]
+    assert (cache_count("hit") - hits, cache_count("miss") - misses) == (2, 2)
+
+    crud_task.update_task_status(
+        db=db, task_id=task_id, task_update=TaskUpdateStatus(status=TaskStatus.COMPLETED)
+    )
+    assert crud_task.get_task_cached(db=db, task_id=task_id).status == TaskStatus.COMPLETED
+    crud_task.delete_task(db=db, task_id=task_id)
+    assert crud_task.get_task_cached(db=db, task_id=task_id) is None
+    assert crud_task.get_tasks_cached(db=db) == []
+
+def test_lru_cache_expiry_and_eviction():
+    """Test the in-process backend drops expired and least recently used entries."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)  # Already expired
+    assert cache.get("d") is None
+
+
+@pytest.mark.anyio
+async def test_change_events_published_on_commit(db: Session):
+    """Test writes publish change events to subscribers once committed, and not on rollback."""
+    queue = await changes.hub.subscribe()
+    try:
+        task = crud_task.create_task(db=db, task=TaskCreate(title="Feed", due_date=datetime.utcnow()))
+        task_id = task.id
+        updated_row = crud_task.update_task_status(
+            db=db, task_id=task_id, task_update=TaskUpdateStatus(status=TaskStatus.COMPLETED)
+        )
+        crud_task.delete_tasks(db=db, task_ids=[task_id])
+
+        # Events recorded in a transaction that rolls back are dropped
+        changes.record(db, "updated", [updated_row])
+        db.rollback()
+
+        batches = [await queue.get() for _ in range(3)]
+        assert queue.empty()
+    finally:
+        changes.hub.unsubscribe(queue)
+
+    events = [change for batch in batches for change in batch]
+    assert [(e["type"], e["task"]["id"]) for e in events] == [
+        ("created", task_id), ("updated", task_id), ("deleted", task_id)
+    ]
+    assert events[1]["task"]["status"] == TaskStatus.COMPLETED
+    assert events[1]["task"]["version"] == 2
+
+def test_change_payloads_fit_notify():
+    """Test events are packed into NOTIFY-sized payloads, oversized tasks trimmed to a summary."""
+    small = {"type": "updated", "task": {"id": 1, "status": "PENDING", "version": 2, "description": "x" * 3000}}
+    large = {"type": "created", "task": {"id": 2, "status": "PENDING", "version": 1, "description": "x" * 9000}}
+    payloads = changes.payloads([small, small, small, large])
+
+    assert all(len(p.encode()) <= changes.MAX_PAYLOAD_BYTES for p in payloads)
+    decoded = [change for p in payloads for change in json.loads(p)]
+    assert [c["task"]["id"] for c in decoded] == [1, 1, 1, 2]
+    assert decoded[3] == {"type": "created", "task": {"id": 2, "status": "PENDING", "version": 1}, "truncated": True}
+
+def make_archivable(db: Session, count: int, days_ago: int = 100) -> List[int]:
+    """Create `count` tasks completed `days_ago` days ago; returns their IDs."""
+    rows = crud_task.create_tasks(db=db, tasks=[
+        TaskCreate(title=f"Old {i}", due_date=datetime(2020, 1, 1), status=TaskStatus.COMPLETED) for i in range(count)
+    ])
+    ids = [row.id for row in rows]
+    db.execute(update(Task).where(Task.id.in_(ids)).values(updated_at=datetime.utcnow() - timedelta(days=days_ago)))
+    db.commit()
+    return ids
+
+def test_archive_tasks(db: Session):
+    """Test old completed tasks move to the archive in batches and drop out of default reads."""
+    old_ids = make_archivable(db, 3)
+    recent = crud_task.create_task(db=db, task=TaskCreate(
+        title="Recent", due_date=datetime(2020, 1, 1), status=TaskStatus.COMPLETED
+    ))
+    pending = crud_task.create_task(db=db, task=TaskCreate(title="Open", due_date=datetime(2020, 1, 1)))
+    cutoff = datetime.utcnow() - timedelta(days=90)
+
+    assert crud_task.archive_tasks(db=db, cutoff=cutoff, batch_size=2) == 2
+    assert crud_task.archive_tasks(db=db, cutoff=cutoff, batch_size=2) == 1
+    assert crud_task.archive_tasks(db=db, cutoff=cutoff, batch_size=2) == 0
+
+    assert sorted(t.id for t in crud_task.get_tasks(db=db)) == sorted([recent.id, pending.id])
+    assert crud_task.get_task(db=db, task_id=old_ids[0]) is None
+    archived = crud_task.get_task(db=db, task_id=old_ids[0], include_archived=True)
+    assert isinstance(archived, ArchivedTask) and archived.title == "Old 0"
+
+    everything = crud_task.get_task_rows(db=db, filters=TaskFilter(include_archived=True))
+    assert [row.id for row in everything] == sorted(old_ids + [recent.id, pending.id])
+    # Filters, sorting and cursors work across both tables
+    first = crud_task.get_task_rows(
+        db=db, limit=2, sort="-id", filters=TaskFilter(include_archived=True, status=[TaskStatus.COMPLETED])
+    )
+    cursor = crud_task.next_cursor(first, 2, sort="-id")
+    rest = crud_task.get_task_rows(
+        db=db, limit=2, sort="-id", cursor=cursor, filters=TaskFilter(include_archived=True, status=[TaskStatus.COMPLETED])
+    )
+    assert [row.id for row in first + rest] == sorted(old_ids + [recent.id], reverse=True)
+
+def test_archive_job(db: Session, db_connection):
+    """Test the archiver job runs batches until nothing is left."""
+    make_archivable(db, 5)
+    factory = sessionmaker(bind=db_connection, join_transaction_mode="create_savepoint")
+    assert archive.archive_completed(older_than_days=90, batch_size=2, session_factory=factory) == 5
+    assert crud_task.get_tasks(db=db) == []
+
+
 # Example structure for a CRUD test (adapt when implementing fully)
 # def test_create_task(db: Session) -> None:
 #     task_in = TaskCreate(title="Test Task", description="Test Desc", status=TaskStatus.PENDING, due_date=...)
 #     created_task = crud_task.create_task(db=db, task=task_in)
 #     assert created_task.title == task_in.title
 #     assert created_task.description == task_in.description
-#     assert created_task.status == task_in.status 
\ No newline at end of file
+#     assert created_task.status == task_in.status
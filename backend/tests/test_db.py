@@ -0,0 +1,185 @@
+import logging
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, text
+
+# Adjust imports based on project structure
+from backend.core import config
+from prometheus_client import REGISTRY
+
+from backend.core.metrics import PoolCollector, current_scope
+from backend.db.events import instrument_queries
+from backend.db import session as db_session
+from backend.db.pool import InstrumentedNullPool, InstrumentedQueuePool, under_pressure
+from backend.db.profiling import QueryProfiler
+from .conftest import worker_database_url
+
+def test_engine_options_queue_pool(monkeypatch):
+    """Test the pool settings from config are passed to the engine."""
+    monkeypatch.setattr(config, "DB_EXTERNAL_POOLER", False)
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(config, "DB_POOL_RECYCLE", 600)
+
+    options = db_session.engine_options("primary")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_recycle"] == 600
+    assert options["pool_logging_name"] == "primary"
+
+def test_engine_options_external_pooler(monkeypatch):
+    """Test an external pooler disables local pooling and asyncpg's statement caches and names."""
+    monkeypatch.setattr(config, "DB_EXTERNAL_POOLER", True)
+
+    options = db_session.engine_options("primary", is_async=True)
+
+    assert options["poolclass"] is InstrumentedNullPool
+    assert "pool_size" not in options
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": db_session.unique_statement_name,
+    }
+    assert db_session.unique_statement_name() != db_session.unique_statement_name()
+
+def test_pool_metrics(tmp_path):
+    """Test checkouts are timed and pool state is reported when collected."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+        pool_size=2, max_overflow=1, pool_logging_name="test-pool",
+    )
+    collector = PoolCollector()
+    collector.register("test-pool", engine)
+    checkouts = lambda: REGISTRY.get_sample_value("taskapi_db_pool_checkout_seconds_count", {"pool": "test-pool"}) or 0
+    before = checkouts()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        gauges = {m.name: m.samples[0].value for m in collector.collect()}
+        assert gauges["taskapi_db_pool_size"] == 2
+        assert gauges["taskapi_db_pool_checked_out"] == 1
+        assert gauges["taskapi_db_pool_overflow"] == 0
+
+    assert checkouts() == before + 1
+    engine.dispose()
+
+def test_query_metrics(tmp_path):
+    """Test statements are counted and timed per engine, route and statement type."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queries.db'}")
+    instrument_queries(engine, "test-queries")
+    labels = {"engine": "test-queries", "route": "/fake/{id}", "operation": "SELECT"}
+
+    class FakeRoute:
+        path = "/fake/{id}"
+
+    token = current_scope.set({"route": FakeRoute()})
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("select 2"))
+    finally:
+        current_scope.reset(token)
+
+    assert REGISTRY.get_sample_value("taskapi_db_queries_total", labels) == 2
+    assert REGISTRY.get_sample_value("taskapi_db_query_duration_seconds_count", labels) == 2
+    engine.dispose()
+
+def test_query_profiler_logs_slow_queries(tmp_path, caplog):
+    """Test slow statements are logged with their plan, and only while profiling is on."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    profiler = QueryProfiler()
+    profiler.register(engine)
+    assert not event.contains(engine, "after_cursor_execute", profiler._after_execute)
+
+    profiler.enable(slow_query_ms=0)
+    with caplog.at_level(logging.WARNING, logger="backend.db.profiling"):
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("SELECT id FROM t WHERE id = :id"), {"id": 1})
+    slow = [r.getMessage() for r in caplog.records if "SELECT id FROM t" in r.getMessage()]
+    assert len(slow) == 1
+    assert "Plan:" in slow[0] and "<not available>" not in slow[0]
+
+    profiler.disable()
+    assert not event.contains(engine, "after_cursor_execute", profiler._after_execute)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="backend.db.profiling"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert caplog.records == []
+    engine.dispose()
+
+def test_query_profiler_flags_chatty_requests(tmp_path, caplog):
+    """Test a request going over the query limit is logged once."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'chatty.db'}")
+    profiler = QueryProfiler()
+    profiler.register(engine)
+    profiler.enable(slow_query_ms=10_000, max_queries=3)
+
+    token = current_scope.set({"method": "GET"})
+    try:
+        with caplog.at_level(logging.WARNING, logger="backend.db.profiling"):
+            with engine.connect() as conn:
+                for i in range(6):
+                    conn.execute(text("SELECT :i"), {"i": i})
+    finally:
+        current_scope.reset(token)
+        profiler.disable()
+
+    assert len(caplog.records) == 1
+    assert "more than 3 queries" in caplog.records[0].getMessage()
+    assert "4x SELECT ?" in caplog.records[0].getMessage()
+    engine.dispose()
+
+def test_query_profiler_explain_in_savepoint(caplog):
+    """Test a failing EXPLAIN on PostgreSQL only rolls back its savepoint, not the request's transaction."""
+    executed = []
+
+    class Cursor:
+        def execute(self, statement, parameters=None):
+            executed.append(statement.split()[0] if statement.startswith("EXPLAIN") else statement)
+            if statement.startswith("EXPLAIN"):
+                raise RuntimeError("permission denied")
+
+        def close(self):
+            pass
+
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        in_transaction=lambda: True,
+        connection=SimpleNamespace(cursor=Cursor),
+    )
+    with caplog.at_level(logging.WARNING, logger="backend.db.profiling"):
+        QueryProfiler()._log_slow_query(conn, "SELECT 1", (), False, 500.0)
+
+    assert executed == ["SAVEPOINT taskapi_explain", "EXPLAIN", "ROLLBACK TO SAVEPOINT taskapi_explain"]
+    assert "EXPLAIN failed" in caplog.text
+
+def test_worker_database_url():
+    """Test each xdist worker gets its own database."""
+    assert worker_database_url("sqlite:////tmp/test.db", None) == "sqlite:////tmp/test.db"
+    assert worker_database_url("sqlite:////tmp/test.db", "gw1") == "sqlite:////tmp/test_gw1.db"
+    assert worker_database_url("postgresql://u:p@db/taskdb", "gw0") == "postgresql://u:p@db/taskdb_gw0"
+
+def test_pools_replaced_after_fork():
+    """Test a forked process starts with new pools instead of its parent's connections."""
+    engine = db_session.get_databases().engine
+    pool = engine.pool
+    db_session._dispose_pools_after_fork()
+    assert engine.pool is not pool
+
+def test_pool_under_pressure(tmp_path, monkeypatch):
+    """Test a pool is under pressure while exhausted after slow checkouts, and recovers."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pressure.db'}", poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_logging_name="pressure-pool",
+    )
+    monkeypatch.setattr(config, "ADMISSION_POOL_WAIT_BUDGET", -1)  # Every checkout is slow
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 0)
+    assert not under_pressure(engine)
+    with engine.connect():
+        assert under_pressure(engine)
+    assert not under_pressure(engine)
+    engine.dispose()
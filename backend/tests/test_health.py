@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+# Adjust imports based on project structure
+from backend.main import app
+from backend.core import config
+from backend.db import health
+from backend.db.base_class import Base
+from backend.db.pool import InstrumentedQueuePool
+
+def test_import_without_database():
+    """Test the app imports without DATABASE_URL, and without creating any engine."""
+    script = (
+        "from backend.main import app\n"
+        "from backend.db import session\n"
+        "assert session._databases is None\n"
+    )
+    env = {name: value for name, value in os.environ.items() if name != "DATABASE_URL"}
+    root = Path(__file__).resolve().parents[2]
+    subprocess.run([sys.executable, "-c", script], env=env, cwd=root, check=True)
+
+def fake_databases(monkeypatch, engine):
+    monkeypatch.setattr(health, "_warmed", False)
+    databases = SimpleNamespace(request_engine=engine, request_engines=lambda: [engine])
+    monkeypatch.setattr(health, "get_databases", lambda: databases)
+
+@pytest.mark.anyio
+async def test_warm_up_opens_and_primes_connections(tmp_path, monkeypatch):
+    """Test warm-up fills the pool (up to its size) and marks the worker ready."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", poolclass=InstrumentedQueuePool, pool_size=3)
+    Base.metadata.create_all(bind=engine)
+    fake_databases(monkeypatch, engine)
+
+    await health.warm_up(connections=10)
+
+    assert engine.pool.checkedin() == 3
+    ready, report = await health.readiness()
+    assert ready
+    assert report["pool"]["size"] == 3
+    engine.dispose()
+
+@pytest.mark.anyio
+async def test_readiness_without_database(tmp_path, monkeypatch):
+    """Test a worker that can't reach its database isn't ready, and says why."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'warm.db'}", poolclass=InstrumentedQueuePool)
+    fake_databases(monkeypatch, engine)
+
+    ready, report = await health.readiness()
+    assert not ready
+    assert report["status"] == "warming_up"
+
+    monkeypatch.setattr(health, "_warmed", True)  # Warmed up, then lost the database
+    ready, report = await health.readiness()
+    assert not ready
+    assert report["status"] == "unavailable"
+
+def test_health_endpoints(schema):
+    """Test the probes: live always, ready once the lifespan has warmed the pools."""
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "alive"}
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+@pytest.mark.anyio
+async def test_readiness_without_configuration(monkeypatch):
+    """Test missing database configuration is reported as unavailable with its reason."""
+    def no_databases():
+        raise ValueError("DATABASE_URL is not set in the environment variables.")
+
+    monkeypatch.setattr(health, "_warmed", True)
+    monkeypatch.setattr(health, "get_databases", no_databases)
+    ready, report = await health.readiness()
+    assert not ready
+    assert report["detail"] == "DATABASE_URL is not set in the environment variables."
+
+def test_warm_up_timeout(monkeypatch, caplog):
+    """Test a database that doesn't answer can't hold up startup: the worker is live, not ready."""
+    async def hang(connections: int = 0):
+        await anyio.sleep(60)
+
+    monkeypatch.setattr(config, "DB_POOL_WARMUP_TIMEOUT", 0.05)
+    monkeypatch.setattr(health, "warm_up", hang)
+    monkeypatch.setattr(health, "_warmed", False)
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+    assert "timed out" in caplog.text
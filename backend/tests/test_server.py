@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Adjust imports based on project structure
+from backend import server
+from backend.core import config
+
+def test_server_options(monkeypatch):
+    """Test the uvicorn settings come from config."""
+    monkeypatch.setattr(config, "SERVER_LOOP", "uvloop")
+    monkeypatch.setattr(config, "SERVER_HTTP", "httptools")
+    monkeypatch.setattr(config, "SERVER_KEEPALIVE", 90)
+
+    options = server.server_options(workers=4)
+
+    assert options["workers"] == 4
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+    assert options["timeout_keep_alive"] == 90
+
+def test_prepare_metrics_dir(monkeypatch, tmp_path):
+    """Test several workers share a cleared prometheus multiprocess directory."""
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    assert server.prepare_metrics_dir(1) is None
+    assert "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert server.prepare_metrics_dir(4) == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+def test_multiprocess_metrics(tmp_path):
+    """Test a scrape adds up the values written by every worker process."""
+    script = (
+        "from backend.core.metrics import CACHE_REQUESTS, render_metrics\n"
+        "CACHE_REQUESTS.labels(cache='tasks', result='hit').inc()\n"
+        "print(render_metrics()[0].decode())\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    root = Path(__file__).resolve().parents[2]
+    runs = [
+        subprocess.run([sys.executable, "-c", script], env=env, cwd=root, capture_output=True, text=True, check=True)
+        for _ in range(2)
+    ]
+    assert 'taskapi_cache_requests_total{cache="tasks",result="hit"} 2.0' in runs[-1].stdout
@@ -7,7 +7,13 @@ import {
   updateTaskStatus,
   deleteTask,
   createTask,
+  subscribeToTaskChanges,
 } from "./services/api";
+import {
+  applyTaskChange,
+  needsRefetch,
+  TASK_PAGE_SIZE,
+} from "./services/taskChanges";
 import { TaskStatus, TaskCreate, Task } from "./types/task";
 import TaskList from "./components/TaskList";
 import AddTaskForm from "./components/AddTaskForm";
@@ -37,6 +43,23 @@ function App() {
     initAll();
   }, []);
 
+  // Keep the list up to date when anyone (including other caseworkers)
+  // changes a task, instead of polling. Changes are applied to the cached
+  // list; it is only fetched again when events were missed.
+  useEffect(
+    () =>
+      subscribeToTaskChanges((change) => {
+        if (needsRefetch(change)) {
+          queryClient.invalidateQueries({ queryKey: ["tasks"] });
+          return;
+        }
+        queryClient.setQueryData<Task[]>(["tasks"], (tasks) =>
+          applyTaskChange(tasks, change)
+        );
+      }),
+    [queryClient]
+  );
+
   const {
     isLoading: isLoadingTasks,
     isError: isTasksError,
@@ -44,7 +67,7 @@ function App() {
     error: tasksError,
   } = useQuery<Task[], Error>({
     queryKey: ["tasks"],
-    queryFn: getTasks,
+    queryFn: () => getTasks({ limit: TASK_PAGE_SIZE }),
   });
 
   const updateStatusMutation = useMutation<
@@ -54,8 +77,12 @@ function App() {
   >({
     mutationFn: (variables) =>
       updateTaskStatus(variables.taskId, variables.statusData),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["tasks"] });
+    // Our own changes are written straight into the cache instead of
+    // refetching the list (the feed's copy of them is then a no-op)
+    onSuccess: (task) => {
+      queryClient.setQueryData<Task[]>(["tasks"], (tasks) =>
+        applyTaskChange(tasks, { type: "updated", task })
+      );
       setAppErrors([]);
     },
     onError: (updateError) => {
@@ -68,8 +95,10 @@ function App() {
 
   const deleteMutation = useMutation<void, Error, number>({
     mutationFn: (taskId: number) => deleteTask(taskId),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["tasks"] });
+    onSuccess: (_, taskId) => {
+      queryClient.setQueryData<Task[]>(["tasks"], (tasks) =>
+        applyTaskChange(tasks, { type: "deleted", task: { id: taskId } })
+      );
       setAppErrors([]);
     },
     onError: (deleteError) => {
@@ -100,8 +129,10 @@ function App() {
     TaskCreate
   >({
     mutationFn: (newTask: TaskCreate) => createTask(newTask),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["tasks"] });
+    onSuccess: (task) => {
+      queryClient.setQueryData<Task[]>(["tasks"], (tasks) =>
+        applyTaskChange(tasks, { type: "created", task })
+      );
       setIsAddTaskFormVisible(false);
       setAppErrors([]);
     },
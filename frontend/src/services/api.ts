@@ -1,4 +1,11 @@
-import { Task, TaskCreate, TaskUpdateStatus } from "../types/task";
+import {
+  Task,
+  TaskChange,
+  TaskCreate,
+  TaskListParams,
+  TaskStats,
+  TaskUpdateStatus,
+} from "../types/task";
 
 // Determine the base URL for the API.
 // In development, it's likely http://localhost:8000 (where the backend runs).
@@ -7,6 +14,13 @@ import { Task, TaskCreate, TaskUpdateStatus } from "../types/task";
 const API_BASE_URL =
   import.meta.env.VITE_API_BASE_URL || "http://localhost:8000/api/v1";
 
+// fetch() for API calls. Credentials are included so the cookie the backend
+// sets after a write comes back with later reads, which then see the write
+// even when reads are served from a lagging database replica.
+function apiFetch(path: string, init: RequestInit = {}): Promise<Response> {
+  return fetch(`${API_BASE_URL}${path}`, { credentials: "include", ...init });
+}
+
 // Helper function for handling API responses
 async function handleResponse<T>(response: Response): Promise<T> {
   if (!response.ok) {
@@ -23,18 +37,36 @@ async function handleResponse<T>(response: Response): Promise<T> {
 
 // --- Task API Functions ---
 
-export async function getTasks(): Promise<Task[]> {
-  const response = await fetch(`${API_BASE_URL}/tasks`);
+export async function getTasks(params: TaskListParams = {}): Promise<Task[]> {
+  // Filtering and sorting happen server-side; only matching rows are returned.
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value === undefined || value === null) continue;
+    // Repeat array params (e.g. status=PENDING&status=IN_PROGRESS)
+    for (const item of Array.isArray(value) ? value : [value]) {
+      query.append(key, String(item));
+    }
+  }
+  const queryString = query.toString();
+  const response = await apiFetch(
+    `/tasks${queryString ? `?${queryString}` : ""}`
+  );
   return handleResponse<Task[]>(response);
 }
 
+export async function getTaskStats(): Promise<TaskStats> {
+  // Aggregated in the database, so dashboards don't need the full list
+  const response = await apiFetch(`/tasks/stats`);
+  return handleResponse<TaskStats>(response);
+}
+
 export async function getTask(taskId: number): Promise<Task> {
-  const response = await fetch(`${API_BASE_URL}/tasks/${taskId}`);
+  const response = await apiFetch(`/tasks/${taskId}`);
   return handleResponse<Task>(response);
 }
 
 export async function createTask(taskData: TaskCreate): Promise<Task> {
-  const response = await fetch(`${API_BASE_URL}/tasks`, {
+  const response = await apiFetch(`/tasks`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -48,7 +80,7 @@ export async function updateTaskStatus(
   taskId: number,
   statusData: TaskUpdateStatus
 ): Promise<Task> {
-  const response = await fetch(`${API_BASE_URL}/tasks/${taskId}/status`, {
+  const response = await apiFetch(`/tasks/${taskId}/status`, {
     method: "PATCH",
     headers: {
       "Content-Type": "application/json",
@@ -58,8 +90,21 @@ export async function updateTaskStatus(
   return handleResponse<Task>(response);
 }
 
+// Take the next pending tasks (due soonest first) and mark them IN_PROGRESS.
+// Concurrent callers never receive the same task.
+export async function claimTasks(limit = 1): Promise<Task[]> {
+  const response = await apiFetch(`/tasks/claim`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ limit }),
+  });
+  return handleResponse<Task[]>(response);
+}
+
 export async function deleteTask(taskId: number): Promise<void> {
-  const response = await fetch(`${API_BASE_URL}/tasks/${taskId}`, {
+  const response = await apiFetch(`/tasks/${taskId}`, {
     method: "DELETE",
   });
   // DELETE might return 204 No Content or the deleted item.
@@ -75,4 +120,20 @@ export async function deleteTask(taskId: number): Promise<void> {
   // No return needed for void promise
 }
 
+// Subscribe to task changes pushed by the server (server-sent events).
+// EventSource reconnects by itself; returns a function that unsubscribes.
+export function subscribeToTaskChanges(
+  onChange: (change: TaskChange) => void
+): () => void {
+  // Not available in every environment (e.g. jsdom in tests)
+  if (typeof EventSource === "undefined") return () => {};
+  const source = new EventSource(`${API_BASE_URL}/tasks/changes`);
+  const handler = (event: MessageEvent) =>
+    onChange(JSON.parse(event.data) as TaskChange);
+  for (const type of ["created", "updated", "deleted", "archived", "reset"]) {
+    source.addEventListener(type, handler);
+  }
+  return () => source.close();
+}
+
 // TODO: Add functions for updateTask if needed (PUT /tasks/{task_id})
@@ -0,0 +1,51 @@
+import { Task, TaskChange } from "../types/task";
+
+// Tasks the list loads: the first page, in the default (id) order
+export const TASK_PAGE_SIZE = 100;
+
+// True if the change can't be applied to the cached list and the list has to
+// be fetched again: events were dropped (reset) or sent without the whole task
+export function needsRefetch(change: TaskChange): boolean {
+  return change.type === "reset" || Boolean(change.truncated) || !change.task;
+}
+
+// Apply a change (from the feed, or one of our own writes) to the cached task
+// list, returning the new list (or the same one if the change doesn't affect it)
+export function applyTaskChange(
+  tasks: Task[] | undefined,
+  change: TaskChange
+): Task[] | undefined {
+  const changed = change.task;
+  if (!tasks || !changed) return tasks;
+  const index = tasks.findIndex((task) => task.id === changed.id);
+
+  switch (change.type) {
+    case "created": {
+      if (index !== -1) return tasks; // Already applied (our own write)
+      const inserted = [...tasks, changed as Task].sort((a, b) => a.id - b.id);
+      // Only kept if it falls within the loaded page
+      if (
+        tasks.length >= TASK_PAGE_SIZE &&
+        inserted[inserted.length - 1].id === changed.id
+      ) {
+        return tasks;
+      }
+      return inserted.slice(0, TASK_PAGE_SIZE);
+    }
+    case "updated": {
+      // Events can arrive after a refetch that already has a newer version
+      if (index === -1 || tasks[index].version > (changed.version ?? 0)) {
+        return tasks;
+      }
+      const updated = [...tasks];
+      updated[index] = { ...tasks[index], ...changed };
+      return updated;
+    }
+    case "deleted":
+    case "archived":
+      if (index === -1) return tasks;
+      return tasks.filter((task) => task.id !== changed.id);
+    default:
+      return tasks;
+  }
+}
@@ -12,6 +12,8 @@ export interface Task {
   description?: string | null; // Optional in backend, allow null from DB
   due_date: string; // Represent datetimes as strings in TS/JSON
   status: TaskStatus;
+  version: number; // Incremented on every update (basis of the ETag)
+  updated_at: string;
 }
 
 // Matches the TaskCreate schema used for creating tasks (backend/schemas/task.py -> TaskCreate)
@@ -26,3 +28,43 @@ export interface TaskCreate {
 export interface TaskUpdateStatus {
   status: TaskStatus;
 }
+
+// Query parameters accepted by GET /tasks (backend/api/v1/endpoints/tasks.py -> read_tasks)
+export interface TaskListParams {
+  skip?: number;
+  limit?: number;
+  cursor?: string;
+  sort?:
+    | "id"
+    | "-id"
+    | "due_date"
+    | "-due_date"
+    | "title"
+    | "-title"
+    | "status"
+    | "-status";
+  status?: TaskStatus[];
+  due_from?: string;
+  due_to?: string;
+  overdue?: boolean;
+  title_prefix?: string;
+  search?: string;
+  include_archived?: boolean; // Also list archived (old completed) tasks
+}
+
+// Matches the TaskStats schema returned by GET /tasks/stats (backend/schemas/task.py -> TaskStats)
+export interface TaskStats {
+  total: number;
+  by_status: Record<TaskStatus, number>;
+  overdue: number; // Not completed and past due
+  due: { today: number; this_week: number; later: number }; // Not completed
+  generated_at: string;
+}
+
+// Event from the change feed, GET /tasks/changes (backend/api/v1/feed.py).
+// "reset" means changes may have been missed: reload everything.
+export interface TaskChange {
+  type: "created" | "updated" | "deleted" | "archived" | "reset";
+  task?: Partial<Task> & { id: number };
+  truncated?: boolean; // Only id, status and version were sent
+}